@@ -143,3 +143,66 @@ ALLOWED_DOCUMENT_TYPES = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Téléchargement des originaux : None (streaming Django avec Range),
+# 'x-accel-redirect' (nginx) ou 'x-sendfile' (Apache / lighttpd)
+DOCUMENT_DOWNLOAD_OFFLOAD = None
+# Location interne nginx qui mappe MEDIA_ROOT (mode x-accel-redirect)
+DOCUMENT_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# Rendu HTML des PDF : précision des coordonnées (px) et sortie lisible (indentée)
+PDF_HTML_COORD_PRECISION = 0.01
+PDF_HTML_DEBUG = False
+# Couche vectorielle : budget d'octets par page avant bascule SVG -> image raster
+PDF_VECTOR_BYTE_BUDGET = 200_000
+PDF_VECTOR_RASTER_SCALE = 1.5
+# Images des PDF réduites à PDF_IMAGE_DISPLAY_SCALE x leur taille d'affichage ; True pour garder les originaux
+PDF_IMAGE_DISPLAY_SCALE = 2.0
+PDF_IMAGE_JPEG_QUALITY = 85
+PDF_KEEP_ORIGINAL_IMAGES = False
+
+# Aperçu à l'upload : vignette de la première page et estimation du coût de traitement
+PREVIEW_THUMBNAIL_WIDTH = 200
+PREVIEW_THUMBNAIL_QUALITY = 70
+PREVIEW_TEXT_LENGTH = 1000
+# Secondes estimées par page : texte natif ou OCR (scan)
+PROCESSING_COST_PER_PAGE = {'native': 0.5, 'scanned': 6.0}
+
+# Vignettes de pages (bandeau du visualiseur) : boîte max en px, format WEBP (JPEG si indisponible)
+PAGE_THUMBNAILS = True
+PAGE_THUMBNAIL_SIZE = (160, 240)
+PAGE_THUMBNAIL_FORMAT = 'WEBP'
+PAGE_THUMBNAIL_QUALITY = 60
+# Durée de cache navigateur des vignettes (URL versionnée par la date de rendu)
+PAGE_THUMBNAIL_CACHE_SECONDS = 365 * 24 * 3600
+
+# OCR : résolution choisie selon la hauteur des glyphes (px visés) et la résolution native du scan
+OCR_MIN_DPI = 150
+OCR_MAX_DPI = 400
+OCR_TARGET_GLYPH_PX = 32
+OCR_SYMBOL_TARGET_GLYPH_PX = 48
+OCR_MAX_PIXELS = 25_000_000
+# Première passe à OCR_FIRST_PASS_RATIO x la résolution cible ; lignes sous OCR_RETRY_CONFIDENCE relues
+OCR_FIRST_PASS_RATIO = 0.65
+OCR_RETRY_CONFIDENCE = 75
+OCR_MAX_RETRY_REGIONS = 40
+# Langues OCR candidates (codes Tesseract) : la langue du document est détectée parmi elles
+OCR_LANGUAGES = ['eng', 'fra']
+# Page scannée : une image couvrant au moins cette fraction de la page est lue directement par l'OCR
+OCR_SCAN_COVERAGE = 0.9
+# Rendus OCR (niveaux de gris) : au-delà de ce nombre de pixels, la page est lue par bandes
+OCR_TILE_PIXELS = 8_000_000
+# OCR par zone : images sans texte natif d'au moins OCR_REGION_MIN_SIZE pt de côté, au plus OCR_MAX_REGIONS par page
+OCR_REGION_MIN_SIZE = 48
+OCR_MAX_REGIONS = 8
+# Budgets par page : au-delà, la page est dégradée (sans OCR des symboles, vecteurs en image, puis texte brut)
+PDF_PAGE_TIME_BUDGET = 30.0
+PDF_PAGE_MAX_PATHS = 20_000
+PDF_PAGE_MAX_IMAGE_PIXELS = 100_000_000
+# Limites de temps (s) par étape d'une page : l'étape qui dépasse est écourtée (symboles : plus d'OCR
+# des symboles sur la page ; zones d'image : zones restantes ignorées ; couche vectorielle : ni SVG ni raster de plus)
+PDF_STAGE_TIME_BUDGETS = {
+    'symbol_ocr': 5.0,
+    'region_ocr': 10.0,
+    'vectors': 5.0,
+}
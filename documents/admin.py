@@ -23,6 +23,7 @@ class DocumentAdmin(admin.ModelAdmin):
     list_filter = [
         'status',
         'file_type',
+        'processing_profile',
         'uploaded_at',
         'processed_at',
         'uploaded_by'
@@ -65,6 +66,7 @@ class DocumentAdmin(admin.ModelAdmin):
         ('Traitement', {
             'fields': (
                 'status',
+                'processing_profile',
                 'uploaded_by',
                 'uploaded_at',
                 'processed_at',
@@ -109,6 +111,7 @@ class DocumentAdmin(admin.ModelAdmin):
         colors = {
             'pending': 'secondary',
             'processing': 'warning',
+            'partial': 'info',
             'completed': 'success',
             'error': 'danger'
         }
@@ -284,9 +287,7 @@ class DocumentAdmin(admin.ModelAdmin):
         count = 0
         for document in queryset:
             if document.status in ['error', 'completed']:
-                document.status = 'pending'
-                document.error_message = None
-                document.save()
+                document.reset_processing()
 
                 # Lancer le traitement en arrière-plan
                 thread = threading.Thread(
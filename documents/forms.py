@@ -18,7 +18,7 @@ class DocumentUploadForm(forms.ModelForm):
 
     class Meta:
         model = Document
-        fields = ['title', 'description', 'original_file']
+        fields = ['title', 'description', 'original_file', 'processing_profile']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -32,7 +32,8 @@ class DocumentUploadForm(forms.ModelForm):
             'original_file': forms.FileInput(attrs={
                 'class': 'form-control',
                 'accept': '.pdf,.docx,.doc,.txt,.html,.xlsx,.xls,.rtf'
-            })
+            }),
+            'processing_profile': forms.Select(attrs={'class': 'form-select'})
         }
 
     def __init__(self, *args, **kwargs):
@@ -154,6 +155,7 @@ class DocumentFilterForm(forms.Form):
         ('', 'Tous les statuts'),
         ('pending', 'En attente'),
         ('processing', 'En cours'),
+        ('partial', 'Partiellement disponibles'),
         ('completed', 'Traités'),
         ('error', 'Erreurs'),
     ]
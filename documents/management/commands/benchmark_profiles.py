@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.utils.page_checkpoint import MemoryCheckpoint
+from documents.utils.pdf_processor import PDFProcessor
+from documents.utils.processing_profiles import PROFILES
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit (pages/s) de chaque profil de traitement sur des PDF, hors base "
+        "(points de reprise en mémoire) : chiffres à publier pour le choix du profil à l'upload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Fichiers PDF à traiter")
+        parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES),
+                            help="Profils à mesurer (tous par défaut)")
+        parser.add_argument('--repeat', type=int, default=1,
+                            help="Nombre de passes par fichier et profil (meilleur temps retenu)")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat doit être au moins 1")
+
+        self.stdout.write(f"{'profil':<12} {'pages':>6} {'secondes':>9} {'pages/s':>8} {'caractères':>11} {'HTML (o)':>10}")
+        for profile in options['profiles']:
+            pages, seconds, chars, html_bytes = 0, 0.0, 0, 0
+            for path in options['files']:
+                best = None
+                for _ in range(options['repeat']):
+                    checkpoint = MemoryCheckpoint()
+                    started = time.perf_counter()
+                    PDFProcessor().process(path, None, checkpoint=checkpoint, profile=profile)
+                    elapsed = time.perf_counter() - started
+                    if best is None or elapsed < best[0]:
+                        best = (elapsed, checkpoint.stored_pages())
+
+                elapsed, stored = best
+                seconds += elapsed
+                pages += len(stored)
+                chars += sum(len(text or '') for _, text, _ in stored)
+                html_bytes += sum(len((page_html or '').encode('utf-8')) for _, _, page_html in stored)
+
+            rate = pages / seconds if seconds else 0.0
+            self.stdout.write(f"{profile:<12} {pages:>6} {seconds:>9.2f} {rate:>8.2f} {chars:>11} {html_bytes:>10}")
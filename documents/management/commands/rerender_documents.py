@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from documents.models import Document, DocumentFormat, DocumentPage
+from documents.utils.page_layout import LayoutVersionError, loads
+from documents.utils.pdf_processor import PDFProcessor
+
+
+class Command(BaseCommand):
+    help = "Régénère le HTML des documents PDF à partir des layouts de pages stockés, sans rouvrir le PDF"
+
+    def add_arguments(self, parser):
+        parser.add_argument('document_ids', nargs='*', type=int,
+                            help="Documents à régénérer (par défaut, tous les documents traités ayant des pages)")
+
+    def handle(self, *args, **options):
+        # Documents en file ou en cours de traitement exclus : le worker écrit leurs pages et leur format
+        documents = Document.objects.filter(pages__isnull=False).exclude(
+            status__in=('pending', 'processing', 'partial')
+        ).distinct()
+        if options['document_ids']:
+            documents = documents.filter(id__in=options['document_ids'])
+
+        processor = PDFProcessor()
+        rendered, skipped = 0, 0
+
+        for document in documents:
+            pages = list(document.pages.order_by('page_number'))
+            try:
+                layouts = [loads(page.layout) for page in pages]
+            except LayoutVersionError as e:
+                skipped += 1
+                self.stdout.write(self.style.WARNING(
+                    f"Document {document.id} ignoré ({e}) : retraitement depuis le PDF nécessaire"
+                ))
+                continue
+
+            result = processor.render_layouts(layouts)
+
+            now = timezone.now()
+            for page, (page_text, page_html) in zip(pages, result['pages']):
+                page.html = page_html
+                page.text = page_text
+                page.rendered_at = now
+            DocumentPage.objects.bulk_update(pages, ['html', 'text', 'rendered_at'])
+
+            document.extracted_content = result['content']
+            document.formatted_content = result['formatted_content']
+            document.save(update_fields=['extracted_content', 'formatted_content'])
+
+            DocumentFormat.objects.update_or_create(
+                document=document,
+                defaults={
+                    'fonts_used': result['fonts_used'],
+                    'generated_css': result['generated_css'],
+                    'style_classes': result['style_classes'],
+                }
+            )
+
+            rendered += 1
+            self.stdout.write(f"Document {document.id} régénéré ({len(pages)} pages)")
+
+        self.stdout.write(self.style.SUCCESS(f"{rendered} document(s) régénéré(s), {skipped} ignoré(s)"))
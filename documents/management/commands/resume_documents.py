@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from documents.models import Document
+from documents.utils.document_processor import DocumentProcessor
+
+
+class Command(BaseCommand):
+    help = (
+        "Relance les traitements interrompus (statut 'processing' ou 'partial' après un arrêt du serveur, ou 'error') : "
+        "les PDF reprennent à la première page non terminée. À lancer quand aucun traitement n'est en cours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('document_ids', nargs='*', type=int,
+                            help="Documents à reprendre (tous les traitements interrompus par défaut)")
+        parser.add_argument('--include-errors', action='store_true',
+                            help="Reprendre aussi les documents en erreur")
+
+    def handle(self, *args, **options):
+        statuses = ['processing', 'partial']
+        if options['include_errors']:
+            statuses.append('error')
+        # Les documents les moins coûteux (estimation de l'aperçu) d'abord
+        documents = Document.objects.filter(status__in=statuses).order_by(
+            F('estimated_cost').asc(nulls_last=True), 'uploaded_at'
+        )
+        if options['document_ids']:
+            documents = documents.filter(id__in=options['document_ids'])
+
+        resumed = 0
+        for document in documents:
+            self.stdout.write(f"Reprise du document {document.id} (pages terminées : {document.processed_pages})")
+            document.reset_processing()
+            if DocumentProcessor(document).process_document():
+                resumed += 1
+            else:
+                self.stdout.write(self.style.WARNING(f"Échec du document {document.id}"))
+
+        self.stdout.write(self.style.SUCCESS(f"{resumed} document(s) repris avec succès"))
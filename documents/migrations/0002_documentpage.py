@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField(verbose_name='Numéro de page')),
+                ('width', models.FloatField(blank=True, null=True, verbose_name='Largeur')),
+                ('height', models.FloatField(blank=True, null=True, verbose_name='Hauteur')),
+                ('layout', models.BinaryField(verbose_name='Layout sérialisé')),
+                ('layout_version', models.PositiveSmallIntegerField(verbose_name='Version du layout')),
+                ('html', models.TextField(blank=True, default='', verbose_name='HTML de la page')),
+                ('text', models.TextField(blank=True, default='', verbose_name='Texte de la page')),
+                ('rendered_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Rendu le')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='documents.document')),
+            ],
+            options={
+                'verbose_name': 'Page du document',
+                'verbose_name_plural': 'Pages des documents',
+                'ordering': ['page_number'],
+                'unique_together': {('document', 'page_number')},
+            },
+        ),
+    ]
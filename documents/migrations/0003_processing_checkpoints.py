@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_documentpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='processed_pages',
+            field=models.PositiveIntegerField(default=0, verbose_name='Pages traitées'),
+        ),
+        migrations.AddField(
+            model_name='documentimage',
+            name='page_number',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Page'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_processing_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='page_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de pages'),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours de traitement'), ('partial', 'Partiellement disponible'), ('completed', 'Traité'), ('error', 'Erreur')], default='pending', max_length=15, verbose_name='Statut'),
+        ),
+    ]
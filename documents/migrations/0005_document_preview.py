@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_partial_availability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='preview_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='previews/%Y/%m/', verbose_name='Vignette'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='preview_text',
+            field=models.TextField(blank=True, null=True, verbose_name="Texte de l'aperçu"),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_width',
+            field=models.FloatField(blank=True, null=True, verbose_name='Largeur de page'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_height',
+            field=models.FloatField(blank=True, null=True, verbose_name='Hauteur de page'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='is_scanned',
+            field=models.BooleanField(default=False, verbose_name='Document scanné'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='estimated_cost',
+            field=models.FloatField(blank=True, null=True, verbose_name='Coût de traitement estimé (s)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentpage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='thumbnails/%Y/%m/', verbose_name='Vignette'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_documentpage_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='pipeline',
+            field=models.CharField(blank=True, choices=[('native', 'Texte natif'), ('ocr', 'OCR (scan)'), ('hybrid', 'Hybride')], default='', max_length=10, verbose_name='Chaîne de traitement'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_document_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='ocr_language',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Langue OCR'),
+        ),
+    ]
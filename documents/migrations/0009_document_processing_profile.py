@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_document_ocr_language'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='processing_profile',
+            field=models.CharField(choices=[('text-only', 'Texte seul (recherche)'), ('fast-layout', 'Mise en page rapide'), ('exact', 'Mise en page exacte'), ('exact+ocr', 'Mise en page exacte + OCR')], default='exact+ocr', max_length=20, verbose_name='Profil de traitement'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_document_processing_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentformat',
+            name='style_classes',
+            field=models.JSONField(blank=True, null=True, verbose_name='Classes de style'),
+        ),
+    ]
@@ -3,6 +3,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .utils.pdf_classifier import PIPELINE_CHOICES
+from .utils.processing_profiles import DEFAULT_PROFILE, PROFILE_CHOICES
+
 
 class Document(models.Model):
     DOCUMENT_TYPES = [
@@ -19,6 +22,7 @@ class Document(models.Model):
     STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('processing', 'En cours de traitement'),
+        ('partial', 'Partiellement disponible'),
         ('completed', 'Traité'),
         ('error', 'Erreur'),
     ]
@@ -46,6 +50,21 @@ class Document(models.Model):
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Téléchargé par")
     uploaded_at = models.DateTimeField(default=timezone.now, verbose_name="Téléchargé le")
     processed_at = models.DateTimeField(blank=True, null=True, verbose_name="Traité le")
+    processed_pages = models.PositiveIntegerField(default=0, verbose_name="Pages traitées")
+    page_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de pages")
+
+    # Aperçu calculé à l'upload (voir utils/preview.py)
+    preview_thumbnail = models.ImageField(upload_to='previews/%Y/%m/', blank=True, null=True, verbose_name="Vignette")
+    preview_text = models.TextField(blank=True, null=True, verbose_name="Texte de l'aperçu")
+    page_width = models.FloatField(blank=True, null=True, verbose_name="Largeur de page")
+    page_height = models.FloatField(blank=True, null=True, verbose_name="Hauteur de page")
+    is_scanned = models.BooleanField(default=False, verbose_name="Document scanné")
+    estimated_cost = models.FloatField(blank=True, null=True, verbose_name="Coût de traitement estimé (s)")
+    pipeline = models.CharField(max_length=10, choices=PIPELINE_CHOICES, blank=True, default='',
+                                verbose_name="Chaîne de traitement")
+    ocr_language = models.CharField(max_length=50, blank=True, default='', verbose_name="Langue OCR")
+    processing_profile = models.CharField(max_length=20, choices=PROFILE_CHOICES, default=DEFAULT_PROFILE,
+                                          verbose_name="Profil de traitement")
 
     # Informations sur les erreurs
     error_message = models.TextField(blank=True, null=True, verbose_name="Message d'erreur")
@@ -64,9 +83,33 @@ class Document(models.Model):
     def is_processed(self):
         return self.status == 'completed'
 
+    def is_processing(self):
+        # 'partial' : traitement en cours, premières pages déjà consultables
+        return self.status in ('processing', 'partial')
+
     def has_images(self):
         return self.images.exists()
 
+    def reset_processing(self, processing_profile=None):
+        """
+        Remet le document en attente de traitement. Un document déjà traité
+        repart de la première page ; sinon le traitement reprendra à la
+        première page non terminée. Un changement de profil de traitement
+        ('processing_profile') fait aussi repartir de la première page.
+        """
+        restart = self.status == 'completed'
+        if processing_profile and processing_profile != self.processing_profile:
+            self.processing_profile = processing_profile
+            restart = True
+        if restart:
+            self.pages.all().delete()
+            self.images.all().delete()
+            self.processed_pages = 0
+        self.status = 'pending'
+        self.error_message = None
+        self.processed_at = None
+        self.save()
+
 
 class DocumentImage(models.Model):
     """Modèle pour stocker les images extraites des documents"""
@@ -74,6 +117,7 @@ class DocumentImage(models.Model):
     image = models.ImageField(upload_to='images/%Y/%m/', verbose_name="Image")
     image_name = models.CharField(max_length=255, verbose_name="Nom de l'image")
     position_in_document = models.IntegerField(verbose_name="Position dans le document")
+    page_number = models.PositiveIntegerField(blank=True, null=True, verbose_name="Page")
     width = models.IntegerField(blank=True, null=True, verbose_name="Largeur")
     height = models.IntegerField(blank=True, null=True, verbose_name="Hauteur")
 
@@ -106,10 +150,38 @@ class DocumentFormat(models.Model):
 
     # CSS généré pour reproduire le style
     generated_css = models.TextField(blank=True, null=True, verbose_name="CSS généré")
+    # Classes de style internées (StyleRegistry.keys()) : une reprise les rétablit sans rejouer le rendu
+    style_classes = models.JSONField(blank=True, null=True, verbose_name="Classes de style")
 
     class Meta:
         verbose_name = "Format du document"
         verbose_name_plural = "Formats des documents"
 
     def __str__(self):
-        return f"Format - {self.document.title}"
\ No newline at end of file
+        return f"Format - {self.document.title}"
+
+class DocumentPage(models.Model):
+    """Layout analysé d'une page PDF, pour régénérer le HTML sans retraiter le PDF"""
+    document = models.ForeignKey(Document, related_name='pages', on_delete=models.CASCADE)
+    page_number = models.PositiveIntegerField(verbose_name="Numéro de page")
+    width = models.FloatField(blank=True, null=True, verbose_name="Largeur")
+    height = models.FloatField(blank=True, null=True, verbose_name="Hauteur")
+
+    # Représentation intermédiaire sérialisée (voir utils/page_layout.py)
+    layout = models.BinaryField(verbose_name="Layout sérialisé")
+    layout_version = models.PositiveSmallIntegerField(verbose_name="Version du layout")
+
+    # Dernier rendu de la page
+    html = models.TextField(blank=True, default='', verbose_name="HTML de la page")
+    text = models.TextField(blank=True, default='', verbose_name="Texte de la page")
+    rendered_at = models.DateTimeField(default=timezone.now, verbose_name="Rendu le")
+    thumbnail = models.ImageField(upload_to='thumbnails/%Y/%m/', blank=True, null=True, verbose_name="Vignette")
+
+    class Meta:
+        verbose_name = "Page du document"
+        verbose_name_plural = "Pages des documents"
+        ordering = ['page_number']
+        unique_together = [('document', 'page_number')]
+
+    def __str__(self):
+        return f"{self.document.title} - Page {self.page_number}"
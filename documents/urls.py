@@ -12,11 +12,13 @@ urlpatterns = [
 
     # API endpoints
     path('api/<int:pk>/status/', views.document_status, name='status'),
+    path('api/<int:pk>/pages/', views.document_pages, name='pages'),
     path('api/<int:pk>/reprocess/', views.reprocess_document, name='reprocess'),
     path('api/<int:pk>/delete/', views.delete_document, name='delete'),
 
     # Téléchargements
     path('<int:pk>/download/', views.download_original, name='download'),
+    path('<int:pk>/pages/<int:page_number>/thumbnail/', views.page_thumbnail, name='page_thumbnail'),
     path('<int:pk>/export-html/', views.export_html, name='export_html'),
     path('api/<int:pk>/save-edits/', views.save_document_edits, name='save_edits'),
 
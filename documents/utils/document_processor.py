@@ -4,6 +4,8 @@ from django.utils import timezone
 from .pdf_processor import PDFProcessor
 from .word_processor import WordProcessor
 from .image_processor import ImageProcessor
+from .page_checkpoint import PageCheckpoint
+from .page_budget import LEVEL_LABELS, TEXT_ONLY
 
 # Importer magic seulement si disponible
 try:
@@ -272,6 +274,12 @@ class DocumentProcessor:
                 "Utiliser un algorithme de segmentation de page",
                 "Ré-analyser avec détection de zones de texte"
             ]
+        elif error_type == 'page_budget':
+            corrections = [
+                "Augmenter PDF_PAGE_TIME_BUDGET ou PDF_PAGE_MAX_PATHS pour ce document",
+                "Retraiter la page isolément avec un budget plus large",
+                "Simplifier la page source (carte ou plan vectoriel très détaillé)"
+            ]
         elif error_type == 'font_detection':
             corrections = [
                 "Normaliser les polices vers des équivalents standard",
@@ -344,7 +352,9 @@ class DocumentProcessor:
 
             if mime_type == 'application/pdf':
                 print("Traitement PDF...")
-                result = self.pdf_processor.process(file_path, self.document)
+                # Chaque page terminée est enregistrée : une nouvelle tentative reprend là où on s'est arrêté
+                checkpoint = PageCheckpoint(self.document, save_images=self._save_images)
+                result = self.pdf_processor.process(file_path, self.document, checkpoint=checkpoint)
 
             elif mime_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document',
                                'application/msword']:
@@ -377,6 +387,8 @@ class DocumentProcessor:
             self.document.author = result.get('author', '')
             self.document.creation_date = result.get('creation_date')
             self.document.modification_date = result.get('modification_date')
+            self.document.pipeline = result.get('pipeline', '')
+            self.document.ocr_language = result.get('ocr_language', '')
             self.document.status = 'completed'
             self.document.processed_at = timezone.now()
             self.document.save()
@@ -388,12 +400,20 @@ class DocumentProcessor:
             if format_info:
                 self._save_format_info(format_info)
 
-            # Traiter les images
+            # Traiter les images (déjà enregistrées page par page pour les PDF)
             images = result.get('images', [])
-            if images:
+            if images and not result.get('images_saved'):
                 print(f"Traitement de {len(images)} images...")
                 self._save_images(images)
 
+            # Pages traitées en mode dégradé (budgets de page dépassés)
+            for report in result.get('page_reports', []):
+                self.log_extraction_error(
+                    'page_budget', 'high' if report['level'] >= TEXT_ONLY else 'medium',
+                    f"Page {report['page_number']} dégradée : {LEVEL_LABELS[report['level']]}",
+                    report, page_number=report['page_number'], element_type='page'
+                )
+
             # Calculer et sauvegarder les métriques de précision
             self.update_extraction_metrics(result)
             self.save_extraction_metrics()
@@ -494,17 +514,20 @@ class DocumentProcessor:
             print(f"Erreur traitement HTML: {e}")
             return self._process_text_file(file_path)
 
-    def _save_images(self, images):
-        """Sauvegarde les images extraites"""
+    def _save_images(self, images, start=0, page_number=None):
+        """Sauvegarde les images extraites (à partir de la position 'start')"""
         try:
             from ..models import DocumentImage
 
-            for i, image_data in enumerate(images):
+            for i, image_data in enumerate(images, start=start):
                 try:
-                    # Sauvegarder l'image
+                    # Sauvegarder l'image (telle quelle si déjà réduite à sa taille d'affichage)
+                    display_sized = image_data.get('display_sized', False)
+                    ext = image_data.get('format', 'png') if display_sized else 'png'
                     image_file = self.image_processor.save_image(
                         image_data['data'],
-                        f"{self.document.id}_image_{i}.png"
+                        f"{self.document.id}_image_{i}.{ext}",
+                        optimize=not display_sized
                     )
 
                     # Créer l'enregistrement
@@ -513,6 +536,7 @@ class DocumentProcessor:
                         image=image_file,
                         image_name=image_data.get('name', f'Image {i + 1}'),
                         position_in_document=i,
+                        page_number=page_number,
                         width=image_data.get('width'),
                         height=image_data.get('height')
                     )
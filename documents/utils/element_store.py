@@ -0,0 +1,117 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from .spatial_index import SpatialIndex
+
+COLUMNS = ('x0', 'y0', 'x1', 'y1')
+
+
+class ElementStore:
+    """
+    Coordonnées des éléments texte d'une page en colonnes (x0, y0, x1, y1), en
+    tableaux NumPy (listes Python si NumPy n'est pas installé), pour le tri, le
+    regroupement en lignes et le recouvrement. Les index renvoyés sont les
+    positions dans la liste de dicts d'origine, qui reste la seule représentation
+    des éléments : le store est construit une fois par page (from_dicts) puis
+    complété (extend) au même rythme que cette liste.
+    """
+
+    def __init__(self):
+        self.columns = {name: [] for name in COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['x0'])
+
+    @classmethod
+    def from_dicts(cls, elements):
+        return cls().extend(elements)
+
+    def extend(self, elements):
+        """Ajoute les coordonnées d'éléments (dicts) ; leurs index suivent ceux déjà présents."""
+        added = {name: [] for name in COLUMNS}
+        for e in elements:
+            for name in COLUMNS:
+                added[name].append(e.get(name, 0))
+
+        for name in COLUMNS:
+            if NUMPY_AVAILABLE:
+                self.columns[name] = np.concatenate([
+                    np.asarray(self.columns[name], dtype=np.float64), np.asarray(added[name], dtype=np.float64)
+                ])
+            else:
+                self.columns[name].extend(added[name])
+        return self
+
+    def _values(self, name):
+        col = self.columns[name]
+        return col.tolist() if NUMPY_AVAILABLE else col
+
+    def order(self, *keys, indices=None):
+        """
+        Index triés (tri stable) selon les colonnes 'keys' par priorité décroissante,
+        équivalent à sorted(..., key=lambda e: (e[k1], e[k2], ...)).
+        """
+        if indices is None:
+            indices = range(len(self))
+        if NUMPY_AVAILABLE:
+            indices = np.asarray(indices, dtype=np.int64)
+            if not len(indices):
+                return []
+            # np.lexsort trie sur la dernière clé en priorité, de façon stable
+            sort_keys = tuple(self.columns[k][indices] for k in reversed(keys))
+            return indices[np.lexsort(sort_keys)].tolist()
+        cols = [self.columns[k] for k in keys]
+        return sorted(indices, key=lambda i: tuple(col[i] for col in cols))
+
+    def cluster_lines(self, indices, tolerance, key='y0'):
+        """
+        Regroupe des index déjà triés selon 'key' : un élément rejoint la ligne
+        courante si |valeur - moyenne de la ligne| <= tolerance (moyenne tenue à jour
+        par somme incrémentale).
+        """
+        values = self._values(key)
+        lines, current, total = [], [], 0.0
+        for i in indices:
+            v = values[i]
+            if current and abs(v - total / len(current)) <= tolerance:
+                current.append(i)
+                total += v
+                continue
+            if current:
+                lines.append(current)
+            current, total = [i], v
+        if current:
+            lines.append(current)
+        return lines
+
+    def covered(self, bboxes, min_ratio):
+        """
+        Pour chaque bbox (x0, y0, x1, y1), True si un élément du store en recouvre
+        plus de 'min_ratio' de la surface.
+        """
+        bboxes = list(bboxes)
+        if not bboxes or not len(self):
+            return [False] * len(bboxes)
+
+        if not NUMPY_AVAILABLE:
+            index = SpatialIndex(zip(self.columns['x0'], self.columns['y0'],
+                                     self.columns['x1'], self.columns['y1']))
+            return [bool(index.overlapping(b, min_ratio)) for b in bboxes]
+
+        x0, y0 = self.columns['x0'][None, :], self.columns['y0'][None, :]
+        x1, y1 = self.columns['x1'][None, :], self.columns['y1'][None, :]
+        result = []
+        chunk = max(1, 1_000_000 // len(self))
+        for start in range(0, len(bboxes), chunk):
+            q = np.asarray(bboxes[start:start + chunk], dtype=np.float64)
+            qx0, qy0, qx1, qy1 = (q[:, k:k + 1] for k in range(4))
+            ix = np.minimum(qx1, x1) - np.maximum(qx0, x0)
+            iy = np.minimum(qy1, y1) - np.maximum(qy0, y0)
+            inter = np.where((ix > 0) & (iy > 0), ix * iy, 0.0)
+            area = np.maximum((qx1 - qx0) * (qy1 - qy0), 1e-6)
+            result.extend((inter / area > min_ratio).any(axis=1).tolist())
+        return result
@@ -0,0 +1,155 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$', re.IGNORECASE)
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(header, size):
+    """
+    Analyse un en-tête Range à plage unique.
+    Retourne (début, fin) inclusifs, None si l'en-tête est absent/ignoré,
+    et lève ValueError si la plage n'est pas satisfiable.
+    """
+    if not header:
+        return None
+
+    match = RANGE_RE.match(header)
+    if not match:
+        # Plages multiples ou syntaxe inconnue : on sert le fichier complet
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # bytes=-N : les N derniers octets (aucun dans un fichier vide)
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError("Plage vide")
+        return max(0, size - length), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError("Plage hors fichier")
+    return start, min(end, size - 1)
+
+
+def _range_iterator(file_obj, start, length, chunk_size=CHUNK_SIZE):
+    """Lit 'length' octets à partir de 'start' par blocs, sans tout charger en mémoire."""
+    try:
+        file_obj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()
+
+
+def _if_range_matches(if_range, etag, last_modified):
+    """
+    If-Range (RFC 9110 §13.1.5) : le validateur doit correspondre exactement,
+    ETag fort identique ou date égale à Last-Modified ; sinon fichier complet.
+    """
+    if_range = if_range.strip()
+    if if_range.startswith('W/'):
+        return False
+    if if_range.startswith('"'):
+        return etag is not None and if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return last_modified is not None and if_range_date is not None and if_range_date == last_modified
+
+
+def _offload_response(field_file, filename, content_type):
+    """Délègue le transfert au serveur frontal (nginx / Apache) si configuré."""
+    mode = getattr(settings, 'DOCUMENT_DOWNLOAD_OFFLOAD', None)
+    if not mode:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'DOCUMENT_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + field_file.name.lstrip('/')
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = field_file.path
+    else:
+        return None
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def serve_file(request, field_file, as_attachment=True, filename=None, content_type=None, cache_control=None):
+    """
+    Sert un FieldFile en streaming (FileResponse) avec support des requêtes Range,
+    ou via X-Accel-Redirect / X-Sendfile selon DOCUMENT_DOWNLOAD_OFFLOAD.
+    """
+    filename = filename or os.path.basename(field_file.name)
+    if content_type is None:
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = _offload_response(field_file, filename, content_type)
+    if response is not None:
+        if cache_control:
+            response['Cache-Control'] = cache_control
+        return response
+
+    size = field_file.size
+    last_modified = None
+    etag = None
+    try:
+        stat = os.stat(field_file.path)
+        last_modified = int(stat.st_mtime)
+        # ETag fort : date de modification (ns) et taille du fichier
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    except (NotImplementedError, OSError, ValueError):
+        pass
+
+    # If-Range : la plage n'est honorée que si le fichier n'a pas changé
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and if_range and not _if_range_matches(if_range, etag, last_modified):
+        range_header = None
+
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file_obj = field_file.open('rb')
+    if byte_range is None:
+        response = FileResponse(file_obj, as_attachment=as_attachment, filename=filename,
+                                content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_range_iterator(file_obj, start, length),
+                                         status=206, content_type=content_type)
+        # Fermé aussi par la réponse : le générateur n'est pas forcément itéré jusqu'au bout
+        # (client déconnecté, HEAD), son finally n'est alors jamais exécuté
+        response._resource_closers.append(file_obj.close)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+
+    response['Accept-Ranges'] = 'bytes'
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    if etag is not None:
+        response['ETag'] = etag
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+
+class HtmlEmitter:
+    """
+    Sérialiseur HTML compact pour les pages positionnées.
+    - coordonnées arrondies à 'precision' (ex: 0.01px) sans zéros inutiles
+    - aucun espace superflu, sauf en mode 'debug' (un élément par ligne,
+      déclarations CSS séparées) pour garder une sortie lisible
+    """
+
+    def __init__(self, precision=0.01, debug=False):
+        self.precision = precision or 0
+        self.debug = debug
+        if self.precision > 0:
+            # décimales du pas lui-même (0.25 -> 2) : un multiple du pas s'écrit exactement
+            self._decimals = max(0, -Decimal(repr(float(self.precision))).normalize().as_tuple().exponent)
+        else:
+            self._decimals = None
+
+    def num(self, value):
+        """Formate un nombre quantifié : 72.02400207519531 -> '72.02'."""
+        value = float(value)
+        if self._decimals is None:
+            return repr(value)
+        value = round(value / self.precision) * self.precision
+        text = f"{value:.{self._decimals}f}"
+        if '.' in text:
+            text = text.rstrip('0').rstrip('.')
+        return '0' if text in ('-0', '') else text
+
+    def px(self, value):
+        text = self.num(value)
+        return text if text == '0' else f"{text}px"
+
+    def style(self, *declarations):
+        """Construit un attribut style à partir de paires (propriété, valeur)."""
+        parts = [f"{prop}:{value}" for prop, value in declarations if value is not None]
+        return ('; ' if self.debug else ';').join(parts)
+
+    def box(self, left, top, width=None, height=None, height_prop='height', extra=()):
+        """Style des coordonnées absolues (les seules propriétés qui varient), plus 'extra' éventuels."""
+        declarations = [('left', self.px(left)), ('top', self.px(top))]
+        if width is not None:
+            declarations.append(('width', self.px(width)))
+        if height is not None:
+            declarations.append((height_prop, self.px(height)))
+        declarations.extend(extra)
+        return self.style(*declarations)
+
+    def open_tag(self, tag, cls=None, style=None, attrs=None):
+        parts = [tag]
+        if cls:
+            parts.append(f'class="{cls}"')
+        for name, value in (attrs or {}).items():
+            parts.append(f'{name}="{value}"')
+        if style:
+            parts.append(f'style="{style}"')
+        return self._line(f"<{' '.join(parts)}>")
+
+    def close_tag(self, tag):
+        return self._line(f"</{tag}>")
+
+    def element(self, tag, content='', cls=None, style=None, attrs=None):
+        opening = self.open_tag(tag, cls, style, attrs).rstrip('\n')
+        return self._line(f"{opening}{content}</{tag}>")
+
+    def void(self, tag, cls=None, style=None, attrs=None):
+        return self.open_tag(tag, cls, style, attrs)
+
+    def _line(self, markup):
+        return markup + '\n' if self.debug else markup
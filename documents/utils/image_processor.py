@@ -13,8 +13,16 @@ class ImageProcessor:
         self.max_height = 2400  # Augmenté pour meilleure qualité
         self.quality = 92  # Qualité augmentée pour préserver les détails
 
-    def save_image(self, image_data, filename):
-        """Sauvegarde une image avec optimisation"""
+    def save_image(self, image_data, filename, optimize=True):
+        """
+        Sauvegarde une image avec optimisation. 'optimize=False' : image déjà
+        dimensionnée pour l'affichage (extraction PDF), enregistrée telle quelle.
+        """
+        if not optimize:
+            django_file = ContentFile(image_data)
+            django_file.name = filename
+            return django_file
+
         try:
             # Ouvrir l'image avec PIL
             image = Image.open(io.BytesIO(image_data))
@@ -122,28 +130,64 @@ class ImageProcessor:
 
         return images
 
-    def create_thumbnail(self, image_path, size=(200, 200)):
-        """Crée une miniature d'une image"""
+    def create_thumbnail(self, image_path, size=(200, 200), img_format=None, quality=None):
+        """
+        Crée une miniature d'une image (chemin, fichier ou image PIL déjà chargée,
+        par ex. un rendu de page). 'img_format' force le format (ex: 'WEBP').
+        """
         try:
+            if isinstance(image_path, Image.Image):
+                return self._encode_thumbnail(self.reduced_copy(image_path, size), img_format, quality)
+
             with Image.open(image_path) as img:
                 img.thumbnail(size, Image.Resampling.LANCZOS)
-
-                # Sauvegarder la miniature
-                thumb_buffer = io.BytesIO()
-                img_format = 'PNG' if img.mode == 'RGBA' else 'JPEG'
-
-                if img_format == 'JPEG' and img.mode == 'RGBA':
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1])
-                    img = background
-
-                img.save(thumb_buffer, format=img_format, quality=self.quality)
-
-                return thumb_buffer.getvalue()
+                return self._encode_thumbnail(img, img_format, quality)
 
         except Exception as e:
             return None
 
+    def reduced_copy(self, img, size):
+        """Copie réduite (proportions conservées) sans modifier l'image source."""
+        ratio = min(size[0] / img.width, size[1] / img.height, 1.0)
+        new_size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+        # reducing_gap : réduction entière rapide avant le rééchantillonnage fin
+        return img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    def _encode_thumbnail(self, img, img_format=None, quality=None):
+        thumb_buffer = io.BytesIO()
+        if img_format is None:
+            img_format = 'PNG' if img.mode == 'RGBA' else 'JPEG'
+
+        if img_format == 'JPEG' and img.mode == 'RGBA':
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+
+        img.save(thumb_buffer, format=img_format, quality=quality or self.quality)
+
+        return thumb_buffer.getvalue()
+
+    @staticmethod
+    def thumbnail_format(preferred='WEBP'):
+        """Format de miniature utilisable : WEBP seulement si Pillow a été compilé avec libwebp."""
+        if preferred == 'WEBP':
+            from PIL import features
+            if not features.check('webp'):
+                return 'JPEG'
+        return preferred
+
+    @staticmethod
+    def pixmap_to_image(pix):
+        """
+        Image PIL (L, RGB, avec alpha éventuel) d'un Pixmap PyMuPDF en niveaux de gris
+        ou RGB : l'image lit directement les pixels du pixmap (frombuffer, sans copie).
+        """
+        alpha = getattr(pix, "alpha", 0)
+        mode = ("RGB" if getattr(pix, "n", 3) - alpha >= 3 else "L") + ("A" if alpha else "")
+        img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+        img.pixmap = pix  # les pixels de l'image sont ceux du pixmap : il doit vivre aussi longtemps
+        return img
+
     def get_image_info(self, image_data):
         """Obtient les informations détaillées d'une image"""
         try:
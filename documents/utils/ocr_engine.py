@@ -0,0 +1,187 @@
+import math
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+# Hauteur de glyphe (pt) supposée quand la page n'a pas de texte natif pour l'estimer
+DEFAULT_GLYPH_HEIGHT = 10.0
+# Chevauchement (pt) des bandes d'un rendu découpé : une ligne de texte tient entière dans une bande
+TILE_OVERLAP = 24.0
+
+# Mots outils par langue Tesseract, pour reconnaître la langue d'un texte (natif ou OCR)
+STOPWORDS = {
+    'eng': {'the', 'and', 'of', 'to', 'in', 'is', 'that', 'for', 'with', 'as', 'are', 'this', 'be', 'by', 'on',
+            'it', 'from', 'or', 'was', 'which', 'an', 'not', 'at', 'have', 'were', 'these', 'should'},
+    'fra': {'le', 'la', 'les', 'des', 'et', 'en', 'du', 'un', 'une', 'est', 'pour', 'que', 'qui', 'dans', 'par',
+            'sur', 'au', 'aux', 'avec', 'ce', 'ces', 'sont', 'pas', 'plus', 'ou', 'être', 'doit'},
+    'deu': {'der', 'die', 'das', 'und', 'ist', 'nicht', 'mit', 'den', 'von', 'zu', 'ein', 'eine', 'auf', 'für',
+            'dem', 'des', 'sich', 'auch', 'werden', 'wird', 'oder', 'sind'},
+    'spa': {'el', 'los', 'las', 'del', 'y', 'que', 'una', 'por', 'con', 'para', 'es', 'se', 'al', 'su', 'como',
+            'más', 'pero', 'sus', 'este', 'son', 'debe'},
+    'ita': {'il', 'di', 'che', 'è', 'della', 'per', 'con', 'non', 'gli', 'del', 'delle', 'sono', 'alla', 'dei',
+            'nel', 'anche', 'questo', 'deve'},
+}
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def choose_dpi(page_width, page_height, glyph_height=None, native_dpi=None, target_px=None):
+    """
+    Résolution d'OCR d'une page : assez pour que les glyphes fassent environ
+    'target_px' (OCR_TARGET_GLYPH_PX) pixels de haut, jamais au-delà de la
+    résolution native du scan (rien à gagner), bornée par OCR_MIN_DPI /
+    OCR_MAX_DPI et par le budget de pixels OCR_MAX_PIXELS.
+    """
+    min_dpi = getattr(settings, 'OCR_MIN_DPI', 150)
+    max_dpi = getattr(settings, 'OCR_MAX_DPI', 400)
+    target_px = target_px or getattr(settings, 'OCR_TARGET_GLYPH_PX', 32)
+
+    dpi = target_px * 72.0 / max(glyph_height or DEFAULT_GLYPH_HEIGHT, 1.0)
+    if native_dpi:
+        dpi = min(dpi, native_dpi)
+    dpi = min(max(dpi, min_dpi), max_dpi)
+
+    max_pixels = getattr(settings, 'OCR_MAX_PIXELS', 25_000_000)
+    area = max(page_width * page_height, 1.0) / (72.0 * 72.0)  # pouces²
+    return int(min(dpi, math.sqrt(max_pixels / area)))
+
+
+def first_pass_dpi(dpi):
+    """Résolution de la première passe (les lignes peu sûres sont refaites à 'dpi')."""
+    ratio = getattr(settings, 'OCR_FIRST_PASS_RATIO', 0.65)
+    return int(min(dpi, max(getattr(settings, 'OCR_MIN_DPI', 150), dpi * ratio)))
+
+
+def raster_bands(top, bottom, width, dpi, max_pixels=None, overlap=TILE_OVERLAP):
+    """
+    Découpe une zone (ordonnées top/bottom et largeur en pt) en bandes horizontales
+    dont le rendu à 'dpi' tient dans OCR_TILE_PIXELS pixels. Retourne des
+    (haut, bas, début du cœur, fin du cœur) : les bandes se chevauchent de 'overlap'
+    et un mot appartient à la bande dont le cœur contient son centre.
+    """
+    max_pixels = max_pixels or getattr(settings, 'OCR_TILE_PIXELS', 8_000_000)
+    scale = dpi / 72.0
+    band_height = max_pixels / max(width * scale, 1.0) / scale
+    if bottom - top <= band_height:
+        return [(top, bottom, float('-inf'), float('inf'))]
+
+    count = int(math.ceil((bottom - top) / max(band_height - overlap, band_height / 2.0)))
+    core = (bottom - top) / count
+    bands = []
+    for i in range(count):
+        core_top, core_bottom = top + i * core, top + (i + 1) * core
+        bands.append((
+            max(top, core_top - overlap / 2.0),
+            min(bottom, core_bottom + overlap / 2.0),
+            core_top if i else float('-inf'),
+            core_bottom if i < count - 1 else float('inf'),
+        ))
+    return bands
+
+
+def ocr_words(img, lang, config):
+    """
+    Mots reconnus par Tesseract : dicts {text, conf, left, top, width, height, line}
+    en pixels de l'image ; 'line' identifie la ligne (bloc, paragraphe, ligne).
+    """
+    data = pytesseract.image_to_data(img, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    words = []
+    for i in range(len(data.get("text", []))):
+        text = (data["text"][i] or "").strip()
+        if not text:
+            continue
+        try:
+            conf = float(data["conf"][i])
+        except (KeyError, TypeError, ValueError):
+            conf = -1.0
+        words.append({
+            "text": text,
+            "conf": conf,
+            "left": float(data["left"][i]),
+            "top": float(data["top"][i]),
+            "width": float(data["width"][i]),
+            "height": float(data["height"][i]),
+            "line": (data["block_num"][i], data["par_num"][i], data["line_num"][i]),
+        })
+    return words
+
+
+def to_page_space(words, origin_x, origin_y, scale_x, scale_y):
+    """Ajoute x0/y0/x1/y1 (coordonnées page) aux mots, depuis les pixels d'une image placée en origin."""
+    for w in words:
+        w["x0"] = origin_x + w["left"] * scale_x
+        w["y0"] = origin_y + w["top"] * scale_y
+        w["x1"] = w["x0"] + w["width"] * scale_x
+        w["y1"] = w["y0"] + w["height"] * scale_y
+    return words
+
+
+def low_confidence_lines(words, threshold):
+    """
+    Lignes contenant au moins un mot sous 'threshold' : liste de
+    (bbox page, index des mots de la ligne), dans l'ordre de lecture.
+    """
+    lines = {}
+    for i, w in enumerate(words):
+        lines.setdefault(w["line"], []).append(i)
+
+    regions = []
+    for indices in lines.values():
+        if min(words[i]["conf"] for i in indices) >= threshold:
+            continue
+        bbox = (
+            min(words[i]["x0"] for i in indices),
+            min(words[i]["y0"] for i in indices),
+            max(words[i]["x1"] for i in indices),
+            max(words[i]["y1"] for i in indices),
+        )
+        regions.append((bbox, indices))
+    return regions
+
+
+def mean_confidence(words):
+    confs = [w["conf"] for w in words if w["conf"] >= 0]
+    return sum(confs) / len(confs) if confs else -1.0
+
+
+@lru_cache(maxsize=1)
+def installed_languages():
+    """Langues Tesseract installées (vide si inconnues)."""
+    if not TESSERACT_AVAILABLE:
+        return frozenset()
+    try:
+        return frozenset(pytesseract.get_languages(config=''))
+    except Exception:
+        return frozenset()
+
+
+def language_candidates():
+    """Langues OCR envisagées (OCR_LANGUAGES), limitées à celles installées quand on les connaît."""
+    candidates = list(getattr(settings, 'OCR_LANGUAGES', ['eng', 'fra']))
+    installed = installed_languages()
+    available = [lang for lang in candidates if lang in installed] if installed else candidates
+    return available or candidates
+
+
+def detect_language(text, candidates, min_hits=5):
+    """
+    Langue (code Tesseract) dont les mots outils sont les plus fréquents dans
+    'text', ou None si l'échantillon est trop maigre ou ambigu.
+    """
+    counts = dict.fromkeys(candidates, 0)
+    for word in WORD_RE.findall((text or '').lower()):
+        for lang in candidates:
+            if word in STOPWORDS.get(lang, ()):
+                counts[lang] += 1
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    if not ranked or ranked[0][1] < min_hits:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < 1.5 * ranked[1][1]:
+        return None
+    return ranked[0][0]
@@ -0,0 +1,143 @@
+import time
+
+from django.conf import settings
+
+# Paliers de dégradation d'une page, du traitement complet au texte brut
+FULL = 0
+NO_SYMBOL_OCR = 1      # pas d'OCR des symboles dessinés (petits tracés, seconde passe)
+RASTER_VECTORS = 2     # couche vectorielle rendue en image, sans filets ni SVG
+TEXT_ONLY = 3          # layout minimal (texte brut de la page)
+
+LEVEL_LABELS = {
+    NO_SYMBOL_OCR: "OCR des symboles ignoré",
+    RASTER_VECTORS: "couche vectorielle rasterisée",
+    TEXT_ONLY: "texte brut uniquement",
+}
+
+
+# Étapes à limite de temps propre (PDF_STAGE_TIME_BUDGETS) : une étape qui la dépasse
+# s'arrête là, la page passe au palier de l'étape (None : palier inchangé, arrêt noté)
+STAGE_LABELS = {
+    'symbol_ocr': "OCR des symboles",
+    'region_ocr': "OCR des zones d'image",
+    'vectors': "couche vectorielle",
+}
+STAGE_LEVELS = {
+    'symbol_ocr': NO_SYMBOL_OCR,
+    'region_ocr': None,
+    'vectors': None,
+}
+
+
+class PageBudgetExceeded(Exception):
+    """La page dépasse ses budgets même dégradée : seul le texte brut est extrait."""
+
+
+class PageBudget:
+    """
+    Budgets de traitement d'une page : temps (PDF_PAGE_TIME_BUDGET secondes),
+    nombre d'items vectoriels (PDF_PAGE_MAX_PATHS) et pixels des images
+    embarquées (PDF_PAGE_MAX_IMAGE_PIXELS). Les contrôles sont faits entre les
+    étapes, et dans les étapes longues (check_deadline) : chaque dépassement fait
+    passer la page au palier suivant, avec sa raison, plutôt que de bloquer le worker.
+    Hors budget de pixels (can_render faux), ni rendu de la page (OCR, vignette,
+    SVG) ni décodage des images au-delà du budget.
+    Les étapes de STAGE_LABELS ont en plus leur propre limite de temps
+    (PDF_STAGE_TIME_BUDGETS) : seule l'étape qui la dépasse est écourtée.
+    """
+
+    def __init__(self, max_seconds=None, max_paths=None, max_pixels=None, stage_limits=None):
+        self.max_seconds = max_seconds or getattr(settings, 'PDF_PAGE_TIME_BUDGET', 30.0)
+        self.max_paths = max_paths or getattr(settings, 'PDF_PAGE_MAX_PATHS', 20_000)
+        self.max_pixels = max_pixels or getattr(settings, 'PDF_PAGE_MAX_IMAGE_PIXELS', 100_000_000)
+        self.stage_limits = stage_limits or getattr(settings, 'PDF_STAGE_TIME_BUDGETS', {})
+        self.started = time.monotonic()
+        self.stage_started = {}
+        self.cut_stages = set()
+        self.level = FULL
+        self.reasons = []
+        # Faux si rendre la page décoderait des images hors budget (OCR impossible)
+        self.can_render = True
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def over_time(self, factor=1.0):
+        return self.elapsed() > self.max_seconds * factor
+
+    def degrade(self, level, reason):
+        """Passe au moins au palier 'level' ; au-delà du dernier palier, la page passe en texte brut."""
+        if level <= self.level:
+            return
+        self.level = level
+        self.reasons.append(f"{LEVEL_LABELS[level]} : {reason}")
+        print(f"    Budget page dépassé -> {LEVEL_LABELS[level]} ({reason})")
+        if level >= TEXT_ONLY:
+            raise PageBudgetExceeded(reason)
+
+    def check_geometry(self, item_count):
+        """Nombre d'items vectoriels : au-delà du budget, plus d'OCR des symboles et vecteurs en image."""
+        if item_count > self.max_paths * 10:
+            self.degrade(TEXT_ONLY, f"{item_count} items vectoriels")
+        elif item_count > self.max_paths:
+            self.degrade(RASTER_VECTORS, f"{item_count} items vectoriels (budget {self.max_paths})")
+
+    def check_images(self, image_pixels):
+        """Pixels des images embarquées : au-delà, aucun rendu de la page (OCR, SVG, vignette)."""
+        if image_pixels > self.max_pixels:
+            self.can_render = False
+            self.degrade(NO_SYMBOL_OCR, f"images de {image_pixels} pixels (budget {self.max_pixels})")
+
+    def check_time(self, stage):
+        """
+        Contrôle du temps avant l'étape 'stage' : la page passe au palier suivant
+        si le budget est dépassé, en texte brut au-delà du double du budget.
+        """
+        if self.over_time(2.0):
+            self.degrade(TEXT_ONLY, f"{self.elapsed():.1f} s avant {stage}")
+        elif self.over_time():
+            self.degrade(min(self.level + 1, RASTER_VECTORS), f"{self.elapsed():.1f} s avant {stage} (budget {self.max_seconds:.0f} s)")
+
+    def check_deadline(self, stage):
+        """
+        Contrôle dans une étape longue (bandes OCR, zones, images) : au-delà du
+        double du budget, l'étape est interrompue et la page passe en texte brut.
+        """
+        if self.over_time(2.0):
+            self.degrade(TEXT_ONLY, f"{self.elapsed():.1f} s pendant {stage}")
+
+    def start_stage(self, stage):
+        """Démarre (ou redémarre) l'horloge de l'étape 'stage'."""
+        self.stage_started[stage] = time.monotonic()
+
+    def check_stage(self, stage):
+        """
+        True si l'étape 'stage' a dépassé sa limite propre : elle doit s'arrêter.
+        La page passe au palier de l'étape (STAGE_LEVELS) ; sans palier, l'arrêt
+        est seulement noté dans les raisons de la page.
+        """
+        limit = self.stage_limits.get(stage)
+        started = self.stage_started.get(stage)
+        if limit is None or started is None:
+            return False
+        elapsed = time.monotonic() - started
+        if elapsed <= limit:
+            return False
+        if STAGE_LEVELS[stage] is not None:
+            self.degrade(STAGE_LEVELS[stage], f"étape à {elapsed:.1f} s (limite {limit:g} s)")
+        elif stage not in self.cut_stages:
+            self.cut_stages.add(stage)
+            reason = f"{STAGE_LABELS[stage]} : étape écourtée à {elapsed:.1f} s (limite {limit:g} s)"
+            self.reasons.append(reason)
+            print(f"    Budget étape dépassé -> {reason}")
+        return True
+
+    def allows(self, level):
+        """True si l'étape supprimée au palier 'level' est encore permise."""
+        return self.level < level
+
+    def report(self):
+        """Résumé de la dégradation (None si la page a été traitée entièrement)."""
+        if self.level == FULL and not self.reasons:
+            return None
+        return {'level': self.level, 'reasons': list(self.reasons), 'elapsed': round(self.elapsed(), 2)}
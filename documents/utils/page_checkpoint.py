@@ -0,0 +1,186 @@
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from . import page_layout
+
+
+def next_cursor(cursor, page_number, stored):
+    """
+    Curseur après l'enregistrement de 'page_number' : il n'avance que sur des
+    pages contiguës ('stored' : numéros enregistrés), une page manquante
+    (échec) arrête la reprise juste avant elle.
+    """
+    if page_number != cursor + 1:
+        return cursor
+    while cursor + 1 in stored:
+        cursor += 1
+    return cursor
+
+
+class MemoryCheckpoint:
+    """
+    Points de reprise en mémoire (aucune persistance) : même interface que
+    PageCheckpoint, pour traiter un PDF hors base (tests, mesures).
+    """
+    saves_images = False
+
+    def __init__(self):
+        self.cursor = 0
+        self.page_total = 0
+        self._pages = {}
+        self._styles = None
+
+    def start(self, page_total):
+        self.page_total = page_total
+
+    def completed_layouts(self, page_total):
+        return [self._pages[n]['layout'] for n in sorted(self._pages) if n <= self.cursor]
+
+    def completed_styles(self):
+        return self._styles
+
+    def save_page(self, page_num, width, height, layout, html, text, images, css=None, styles=None,
+                  thumbnail=None):
+        self._pages[page_num + 1] = {'layout': layout, 'html': html, 'text': text}
+        if styles is not None:
+            self._styles = styles
+        self.cursor = next_cursor(self.cursor, page_num + 1, self._pages)
+
+    def stored_pages(self):
+        return [(n, self._pages[n]['text'], self._pages[n]['html']) for n in sorted(self._pages)]
+
+    def has_images(self):
+        return False
+
+
+class PageCheckpoint:
+    """
+    Points de reprise par page d'un document PDF : chaque page terminée est
+    enregistrée (DocumentPage + images) avec le curseur Document.processed_pages,
+    dans une même transaction. Une nouvelle tentative reprend à la première
+    page non terminée ; l'assemblage final relit les pages stockées.
+    Dès la première page enregistrée, le document passe en 'partial' : les
+    pages terminées sont consultables pendant la suite du traitement.
+    """
+    saves_images = True
+
+    def __init__(self, document, save_images=None):
+        self.document = document
+        self.save_images = save_images
+
+    @property
+    def cursor(self):
+        return self.document.processed_pages
+
+    def start(self, page_total):
+        """Enregistre le nombre de pages du document (progression affichée)."""
+        from ..models import Document
+
+        if self.document.page_count != page_total:
+            Document.objects.filter(pk=self.document.pk).update(page_count=page_total)
+            self.document.page_count = page_total
+
+    def completed_layouts(self, page_total):
+        """
+        Layouts des pages déjà terminées. Les pages au-delà du document ou dont
+        le layout n'est plus lisible (autre LAYOUT_VERSION) sont à refaire :
+        le curseur est ramené avant la première d'entre elles.
+        """
+        from ..models import DocumentPage
+
+        cursor = min(self.document.processed_pages, page_total)
+        layouts = []
+        pages = DocumentPage.objects.filter(document=self.document, page_number__lte=cursor).order_by('page_number')
+        for page in pages:
+            if page.layout_version != page_layout.LAYOUT_VERSION:
+                cursor = page.page_number - 1
+                break
+            try:
+                layouts.append(page_layout.loads(page.layout))
+            except page_layout.LayoutVersionError as e:
+                print(f"Layout page {page.page_number} illisible ({e}), page à retraiter")
+                cursor = page.page_number - 1
+                break
+
+        if cursor != self.document.processed_pages:
+            self._truncate(cursor)
+        return layouts
+
+    def completed_styles(self):
+        """
+        Classes de style (StyleRegistry.keys()) enregistrées avec la dernière page,
+        None si le document n'en a pas (commencé avant leur enregistrement).
+        """
+        from ..models import DocumentFormat
+
+        return DocumentFormat.objects.filter(document=self.document).values_list(
+            'style_classes', flat=True
+        ).first()
+
+    def save_page(self, page_num, width, height, layout, html, text, images, css=None, styles=None,
+                  thumbnail=None):
+        """
+        Enregistre une page terminée. 'css' est la feuille de style générée
+        jusqu'ici : elle suffit à afficher les pages déjà disponibles ; 'styles'
+        (StyleRegistry.keys()) permet à une reprise de retrouver les mêmes classes.
+        'thumbnail' ({'data', 'ext'}) est la vignette de la page.
+        """
+        from ..models import Document, DocumentFormat, DocumentImage, DocumentPage
+
+        page_number = page_num + 1
+        with transaction.atomic():
+            DocumentPage.objects.filter(document=self.document, page_number=page_number).delete()
+            DocumentImage.objects.filter(document=self.document, page_number=page_number).delete()
+            page = DocumentPage(
+                document=self.document,
+                page_number=page_number,
+                width=width,
+                height=height,
+                layout=page_layout.dumps(layout),
+                layout_version=page_layout.LAYOUT_VERSION,
+                html=html,
+                text=text,
+                rendered_at=timezone.now(),
+            )
+            if thumbnail:
+                page.thumbnail.save(
+                    f"page_{self.document.pk}_{page_number}.{thumbnail['ext']}",
+                    ContentFile(thumbnail['data']),
+                    save=False,
+                )
+            page.save()
+            if images and self.save_images:
+                start = DocumentImage.objects.filter(document=self.document).count()
+                self.save_images(images, start=start, page_number=page_number)
+
+            if css is not None:
+                DocumentFormat.objects.update_or_create(
+                    document=self.document, defaults={'generated_css': css, 'style_classes': styles}
+                )
+
+            stored = set(DocumentPage.objects.filter(
+                document=self.document, page_number__gt=self.document.processed_pages
+            ).values_list('page_number', flat=True))
+            fields = {'processed_pages': next_cursor(self.document.processed_pages, page_number, stored)}
+            if self.document.status == 'processing':
+                fields['status'] = 'partial'
+            Document.objects.filter(pk=self.document.pk).update(**fields)
+            for name, value in fields.items():
+                setattr(self.document, name, value)
+
+    def stored_pages(self):
+        """(numéro, texte, HTML) de chaque page stockée, dans l'ordre du document."""
+        return list(self.document.pages.order_by('page_number').values_list('page_number', 'text', 'html'))
+
+    def has_images(self):
+        return self.document.images.exists()
+
+    def _truncate(self, cursor):
+        from ..models import Document, DocumentImage, DocumentPage
+
+        with transaction.atomic():
+            DocumentPage.objects.filter(document=self.document, page_number__gt=cursor).delete()
+            DocumentImage.objects.filter(document=self.document, page_number__gt=cursor).delete()
+            Document.objects.filter(pk=self.document.pk).update(processed_pages=cursor)
+        self.document.processed_pages = cursor
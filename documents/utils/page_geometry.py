@@ -0,0 +1,278 @@
+import re
+
+from .spatial_index import SpatialIndex
+
+# Trait rendu tel quel par les filets div (1px #333) : foncé, fin, plein
+DEFAULT_STROKE_MAX = 0.25          # composantes RGB (0..1) d'un trait « noir »
+DEFAULT_WIDTH_RANGE = (0.3, 1.5)   # épaisseurs rendues à 1px sans perte visible
+# Opérateurs de tracé (segment, rectangle, courbes) dans un flux de contenu
+PATH_OPERATOR_RE = re.compile(rb'\s(?:l|re|c|v|y)(?=\s)')
+
+
+class PageGeometry:
+    """
+    Géométrie vectorielle d'une page, extraite UNE seule fois via page.get_drawings()
+    et partagée par la détection de grilles, le rendu des filets et la détection
+    des symboles dessinés.
+    - H / V   : segments horizontaux (x0, y, x1, y) et verticaux (x, y0, x, y1)
+    - RECTS   : rectangles (x0, y0, x1, y1)
+    - rect_styles : style de chaque rectangle de RECTS, (fond, trait, épaisseur)
+      en couleurs CSS, ou None pour un simple cadre noir fin
+    - paths   : bbox de chaque tracé (x0, y0, x1, y1)
+    - other_items : nombre d'items non alignés (courbes, obliques, quads)
+    - styled_items : items alignés dont le style ne passe pas en filets div
+      (segments colorés, épais ou remplis, pointillés, transparence)
+    Les index spatiaux (h_index, v_index, rect_index) sont construits à la demande.
+    """
+
+    def __init__(self, H=None, V=None, RECTS=None, paths=None, other_items=0, item_count=0,
+                 rect_styles=None, styled_items=0):
+        self.H = H or []
+        self.V = V or []
+        self.RECTS = RECTS or []
+        self.rect_styles = rect_styles or [None] * len(self.RECTS)
+        self.paths = paths or []
+        self.other_items = other_items
+        self.styled_items = styled_items
+        self.item_count = item_count
+        self._indexes = {}
+
+    @classmethod
+    def from_page(cls, page, max_items=None):
+        """
+        Avec 'max_items', la lecture s'arrête au-delà de ce nombre d'items
+        (item_count vaut alors max_items + 1) ; une page dont le flux de contenu
+        compte déjà plus d'opérateurs de tracé n'est pas passée à get_drawings().
+        """
+        geometry = cls()
+        if max_items is not None:
+            try:
+                operators = len(PATH_OPERATOR_RE.findall(page.read_contents() or b""))
+            except Exception:
+                operators = 0
+            if operators > max_items:
+                print(f"    {operators} opérateurs de tracé : get_drawings() non appelé")
+                geometry.item_count = max_items + 1
+                return geometry
+        try:
+            drawings = page.get_drawings()
+        except Exception as e:
+            print(f"    Erreur get_drawings(): {e}")
+            return geometry
+
+        for d in drawings:
+            if max_items is not None and geometry.item_count > max_items:
+                geometry.item_count = max_items + 1
+                break
+            rect = d.get("rect")
+            if rect is not None:
+                try:
+                    geometry.paths.append((float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1)))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+
+            style = _drawing_style(d)
+            for it in d.get("items", []):
+                try:
+                    geometry._add_item(it, style)
+                except Exception as e_item:
+                    print(f"      Skip drawing item {it[:2]}… cause: {e_item}")
+
+        geometry.simplify()
+        return geometry
+
+    def simplify(self, tol=0.5, gap=1.0):
+        """
+        Fusionne les segments colinéaires qui se chevauchent ou se touchent
+        (à 'gap' près, sur une même ligne à 'tol' près) et supprime les rectangles
+        en double. Une grille dessinée cellule par cellule devient une ligne par bord.
+        """
+        self.H = [(a0, c, a1, c) for c, a0, a1 in _merge_collinear(
+            [(y, x0, x1) for x0, y, x1, _ in self.H], tol, gap)]
+        self.V = [(c, a0, c, a1) for c, a0, a1 in _merge_collinear(
+            [(x, y0, y1) for x, y0, _, y1 in self.V], tol, gap)]
+
+        # un rectangle rempli puis tracé (deux dessins) garde le fond et le trait
+        seen, rects, styles = {}, [], []
+        for (x0, y0, x1, y1), style in zip(self.RECTS, self.rect_styles):
+            x0, x1 = min(x0, x1), max(x0, x1)
+            y0, y1 = min(y0, y1), max(y0, y1)
+            key = tuple(round(v / tol) for v in (x0, y0, x1, y1))
+            if key in seen:
+                i = seen[key]
+                styles[i] = _merge_styles(styles[i], style)
+                continue
+            seen[key] = len(rects)
+            rects.append((x0, y0, x1, y1))
+            styles.append(style)
+        self.RECTS = rects
+        self.rect_styles = styles
+        self._indexes = {}
+
+    def _add_item(self, it, style=None):
+        """
+        'style' : résultat de _drawing_style() pour le dessin de l'item
+        (None = trait noir fin sans fond, rendu exact en filets div).
+        """
+        cmd = it[0] if it else None
+        if not cmd:
+            return
+        self.item_count += 1
+
+        if cmd == "l":
+            # PyMuPDF donne des fitz.Point (indexables, mais ni tuple ni liste)
+            if len(it) >= 3 and (isinstance(it[1], (tuple, list)) or hasattr(it[1], "x")):
+                x0, y0 = float(it[1][0]), float(it[1][1])
+                x1, y1 = float(it[2][0]), float(it[2][1])
+            elif len(it) >= 5:
+                _, x0, y0, x1, y1 = it[:5]
+                x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)
+            else:
+                return
+            if abs(y1 - y0) < 0.5:
+                self.H.append((min(x0, x1), y0, max(x0, x1), y0))
+            elif abs(x1 - x0) < 0.5:
+                self.V.append((x0, min(y0, y1), x0, max(y0, y1)))
+            else:
+                self.other_items += 1
+                return
+            if style is not None:
+                self.styled_items += 1
+        elif cmd == "re":
+            if len(it) >= 2 and hasattr(it[1], "x0"):
+                r = it[1]
+                rect = (float(r.x0), float(r.y0), float(r.x1), float(r.y1))
+            elif len(it) >= 5:
+                _, x0, y0, x1, y1 = it[:5]
+                rect = (float(x0), float(y0), float(x1), float(y1))
+            else:
+                return
+            self.RECTS.append(rect)
+            # fond, couleur et épaisseur du trait sont rendus ; pointillés et transparence non
+            self.rect_styles.append(style[:3] if style is not None else None)
+            if style is not None and style[3]:
+                self.styled_items += 1
+        else:
+            self.other_items += 1
+
+    @property
+    def lossless_grid(self):
+        """True si les filets div rendent la page à l'identique (traits alignés, style simple)."""
+        return not self.other_items and not self.styled_items
+
+    @property
+    def primitive_count(self):
+        return len(self.H) + len(self.V) + len(self.RECTS)
+
+    def _index(self, name):
+        index = self._indexes.get(name)
+        if index is None:
+            index = SpatialIndex(getattr(self, name))
+            self._indexes[name] = index
+        return index
+
+    @property
+    def h_index(self):
+        return self._index('H')
+
+    @property
+    def v_index(self):
+        return self._index('V')
+
+    @property
+    def rect_index(self):
+        return self._index('RECTS')
+
+    def is_empty(self):
+        return not self.item_count
+
+    def symbol_candidates(self, min_w=5, max_w=40, min_h=5, max_h=30):
+        """Petits tracés isolés, susceptibles d'être des symboles (≤ ≥ ≠ …) dessinés."""
+        return [
+            (x0, y0, x1, y1) for x0, y0, x1, y1 in self.paths
+            if min_w < x1 - x0 < max_w and min_h < y1 - y0 < max_h
+        ]
+
+
+DEFAULT_STROKE = '#000000'
+
+
+def _css_color(color):
+    """Couleur PyMuPDF (composantes 0..1, gris, RGB ou CMJN) -> '#rrggbb', None si absente."""
+    if not color:
+        return None
+    try:
+        if len(color) == 1:
+            color = (color[0],) * 3
+        elif len(color) == 4:
+            c, m, y, k = color
+            color = ((1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k))
+        r, g, b = (min(255, max(0, int(round(float(v) * 255)))) for v in color[:3])
+    except (TypeError, ValueError):
+        return None
+    if max(r, g, b) <= DEFAULT_STROKE_MAX * 255:
+        return DEFAULT_STROKE
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _default_width(width):
+    return DEFAULT_WIDTH_RANGE[0] <= width <= DEFAULT_WIDTH_RANGE[1]
+
+
+def _drawing_style(d):
+    """
+    Style d'un dessin de get_drawings() : (fond, trait, épaisseur, non_rendu) avec
+    fond/trait en '#rrggbb' ou None ; 'non_rendu' signale pointillés ou transparence.
+    None pour un trait noir fin sans fond, le rendu par défaut des filets.
+    """
+    kind = d.get("type") or ('f' if d.get("fill") else '') + ('s' if d.get("color") else '')
+    fill = _css_color(d.get("fill")) if 'f' in kind else None
+    stroke = _css_color(d.get("color")) if 's' in kind else None
+    try:
+        width = float(d.get("width") or 1.0)
+    except (TypeError, ValueError):
+        width = 1.0
+    dashes = str(d.get("dashes") or "").replace(" ", "")
+    opacities = (d.get("fill_opacity") if fill else None, d.get("stroke_opacity") if stroke else None)
+    unrendered = dashes not in ("", "[]0") or any(o is not None and o < 1.0 for o in opacities)
+    if fill is None and stroke == DEFAULT_STROKE and _default_width(width) and not unrendered:
+        return None
+    return (fill, stroke, width, unrendered)
+
+
+def _merge_styles(a, b):
+    """Style d'un rectangle dessiné deux fois (ex: fond puis cadre) : fond et trait conservés."""
+    a = a or (None, DEFAULT_STROKE, 1.0)
+    b = b or (None, DEFAULT_STROKE, 1.0)
+    fill = a[0] or b[0]
+    stroke, width = (a[1], a[2]) if a[1] and (a[1] != DEFAULT_STROKE or not b[1]) else (b[1], b[2])
+    if fill is None and stroke == DEFAULT_STROKE and _default_width(width):
+        return None
+    return (fill, stroke, width)
+
+
+def _merge_collinear(spans, tol, gap):
+    """
+    spans : (coordonnée transverse, début, fin).
+    Regroupe les segments d'une même ligne (écart transverse <= tol) puis
+    fusionne les intervalles qui se chevauchent ou sont séparés de <= gap.
+    """
+    spans = sorted(spans)
+    merged = []
+    i, n = 0, len(spans)
+    while i < n:
+        c_ref = spans[i][0]
+        j = i
+        while j < n and spans[j][0] - c_ref <= tol:
+            j += 1
+        group = sorted(spans[i:j], key=lambda s: s[1])
+        cur0, cur1 = group[0][1], group[0][2]
+        for _, a0, a1 in group[1:]:
+            if a0 <= cur1 + gap:
+                cur1 = max(cur1, a1)
+            else:
+                merged.append((c_ref, cur0, cur1))
+                cur0, cur1 = a0, a1
+        merged.append((c_ref, cur0, cur1))
+        i = j
+    return merged
@@ -0,0 +1,107 @@
+import json
+import struct
+import zlib
+
+# À incrémenter à chaque changement de la structure du layout : les pages
+# stockées avec une autre version doivent être ré-analysées depuis le PDF.
+LAYOUT_VERSION = 2
+
+MAGIC = b'PDLY'
+HEADER = struct.Struct('>4sHII')  # magic, version, taille JSON compressé, nombre de blobs
+BLOB_LENGTH = struct.Struct('>I')
+
+# Ordre des champs d'un élément texte sérialisé (liste plutôt que dict)
+ELEMENT_FIELDS = ('id', 'x0', 'y0', 'x1', 'y1', 'text', 'font', 'size', 'flags', 'color', 'parts')
+
+
+class LayoutVersionError(ValueError):
+    """Layout illisible ou produit par une autre version de l'analyse."""
+
+
+def pack_elements(elements):
+    return [[e.get(name) for name in ELEMENT_FIELDS] for e in elements]
+
+
+def unpack_elements(rows):
+    elements = []
+    for row in rows:
+        e = dict(zip(ELEMENT_FIELDS, row))
+        if e['parts'] is None:
+            del e['parts']
+        else:
+            e['parts'] = [tuple(p) for p in e['parts']]
+        elements.append(e)
+    return elements
+
+
+def dumps(layout):
+    """
+    Sérialise le layout d'une page : en-tête versionné, JSON compressé (zlib)
+    puis les données binaires (images, raster) ajoutées telles quelles.
+    """
+    blobs = []
+
+    def blob(data):
+        if data is None:
+            return None
+        blobs.append(bytes(data))
+        return len(blobs) - 1
+
+    payload = dict(layout)
+    payload['elements'] = pack_elements(layout.get('elements', []))
+    payload['grids'] = [
+        {**grid, 'cells': [[r, c, pack_elements(spans)] for r, c, spans in grid['cells']]}
+        for grid in layout.get('grids', [])
+    ]
+    payload['images'] = [
+        {**{k: v for k, v in img.items() if k != 'data'}, 'data': blob(img.get('data'))}
+        for img in layout.get('images', [])
+    ]
+    vector = dict(layout.get('vector') or {'strategy': 'none'})
+    if 'png' in vector:
+        vector['png'] = blob(vector['png'])
+    payload['vector'] = vector
+
+    compressed = zlib.compress(json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    parts = [HEADER.pack(MAGIC, LAYOUT_VERSION, len(compressed), len(blobs)), compressed]
+    for data in blobs:
+        parts.append(BLOB_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def loads(data):
+    """Relit un layout sérialisé par dumps() ; lève LayoutVersionError si incompatible."""
+    data = bytes(data)
+    if len(data) < HEADER.size:
+        raise LayoutVersionError("Layout tronqué")
+    magic, version, json_size, blob_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise LayoutVersionError("Format de layout inconnu")
+    if version != LAYOUT_VERSION:
+        raise LayoutVersionError(f"Layout version {version}, version attendue {LAYOUT_VERSION}")
+
+    offset = HEADER.size
+    layout = json.loads(zlib.decompress(data[offset:offset + json_size]).decode('utf-8'))
+    offset += json_size
+
+    blobs = []
+    for _ in range(blob_count):
+        (size,) = BLOB_LENGTH.unpack_from(data, offset)
+        offset += BLOB_LENGTH.size
+        blobs.append(data[offset:offset + size])
+        offset += size
+
+    def blob(index):
+        return None if index is None else blobs[index]
+
+    layout['elements'] = unpack_elements(layout.get('elements', []))
+    for grid in layout.get('grids', []):
+        grid['cells'] = [[r, c, unpack_elements(spans)] for r, c, spans in grid['cells']]
+    for img in layout.get('images', []):
+        img['data'] = blob(img.get('data'))
+    vector = layout.get('vector') or {'strategy': 'none'}
+    if 'png' in vector:
+        vector['png'] = blob(vector['png'])
+    layout['vector'] = vector
+    return layout
@@ -0,0 +1,65 @@
+NATIVE = 'native'
+OCR = 'ocr'
+HYBRID = 'hybrid'
+
+PIPELINE_CHOICES = [
+    (NATIVE, 'Texte natif'),
+    (OCR, 'OCR (scan)'),
+    (HYBRID, 'Hybride'),
+]
+
+# Même seuil que PDFProcessor._should_ocr : en dessous, la page n'a pas de vraie couche texte
+MIN_TEXT_CHARS = 30
+# Part de la page couverte par des images au-delà de laquelle une page avec texte est mixte
+MIXED_IMAGE_COVERAGE = 0.15
+SAMPLE_PAGES = 8
+
+
+def page_profile(page):
+    """
+    Mesures peu coûteuses d'une page (sans extraction 'dict') : caractères de la
+    couche texte, nombre de polices et part de la page couverte par des images.
+    """
+    page_area = max(page.rect.width * page.rect.height, 1.0)
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info.get('bbox', (0, 0, 0, 0))
+        covered += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    return {
+        'chars': len((page.get_text("text") or '').strip()),
+        'fonts': len(page.get_fonts()),
+        'image_coverage': min(1.0, covered / page_area),
+    }
+
+
+def classify_page(profile):
+    if profile['chars'] < MIN_TEXT_CHARS:
+        return OCR
+    if profile['image_coverage'] >= MIXED_IMAGE_COVERAGE:
+        return HYBRID
+    return NATIVE
+
+
+def sample_indices(page_total, sample=SAMPLE_PAGES):
+    """Pages échantillonnées, réparties sur tout le document."""
+    if page_total <= sample:
+        return list(range(page_total))
+    return sorted({round(i * (page_total - 1) / (sample - 1)) for i in range(sample)})
+
+
+def classify_document(doc, sample=SAMPLE_PAGES):
+    """
+    Chaîne de traitement du document d'après un échantillon de pages :
+    NATIVE (couche texte partout), OCR (scans) ou HYBRID (mélange, ou texte et
+    images sur les mêmes pages). Les pages restent vérifiées une à une ensuite.
+    """
+    kinds = set()
+    for page_num in sample_indices(len(doc), sample):
+        try:
+            kinds.add(classify_page(page_profile(doc[page_num])))
+        except Exception as e:
+            print(f"Classification page {page_num + 1} impossible: {e}")
+            kinds.add(HYBRID)
+    if len(kinds) == 1:
+        return kinds.pop()
+    return HYBRID
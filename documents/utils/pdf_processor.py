@@ -1,17 +1,30 @@
 # documents/utils/pdf_processor.py
 import base64
 import io
+import math
 import re
 from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
+from .html_emitter import HtmlEmitter
+from .image_processor import ImageProcessor
+from . import ocr_engine
+from . import pdf_classifier
+from . import processing_profiles
+from .page_budget import NO_SYMBOL_OCR, RASTER_VECTORS, PageBudget, PageBudgetExceeded
+from .element_store import ElementStore
+from .page_geometry import PageGeometry
+from .page_checkpoint import MemoryCheckpoint
+from .spatial_index import SpatialIndex
+from .style_registry import StyleRegistry
+from .table_engine import assign_to_cells, cluster_rows, column_thresholds, nearest_column
+from .text_normalization import normalize_math_symbols, normalize_pua_symbols
 # OCR (optionnel)
 try:
     import pytesseract
     pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
     from PIL import Image
-    # AJOUT:
-    from PIL import ImageDraw
 
     OCR_AVAILABLE = True
 except ImportError:
@@ -42,6 +55,26 @@ try:
 except ImportError:
     OCR_AVAILABLE = False
 
+# Tesseract : mots d'une page (psm 6) ou d'une seule ligne (psm 7, passe de reprise).
+# Pas de liste blanche : sans l'espace (qu'une option -c ne peut pas porter sous Windows),
+# le moteur LSTM colle les mots d'une ligne en un seul, de confiance nulle ; elle écartait
+# aussi les lettres accentuées.
+OCR_WORD_OPTIONS = r'-c preserve_interword_spaces=1 '
+OCR_PAGE_CONFIG = r'--oem 3 --psm 6 ' + OCR_WORD_OPTIONS
+OCR_LINE_CONFIG = r'--oem 3 --psm 7 ' + OCR_WORD_OPTIONS
+# Zones d'image (figures, schémas) : texte épars (psm 11)
+OCR_REGION_CONFIG = r'--oem 3 --psm 11 ' + OCR_WORD_OPTIONS
+# Police des mots lus par OCR dans une image affichée : rendus en calque transparent
+OCR_REGION_FONT = "OCR-REGION"
+
+SVG_TEXT_RE = re.compile(r'<text[\s\S]*?</text>', re.IGNORECASE)
+SVG_IMAGE_RE = re.compile(r'<image\b[^>]*?(?:/>|>[\s\S]*?</image>)', re.IGNORECASE)
+SVG_IMAGE_DATA_RE = re.compile(r'data:image/[^"\']+')
+# Une image n'est réduite que si elle dépasse d'au moins ce facteur (en pixels) sa taille cible
+IMAGE_DOWNSAMPLE_MIN_RATIO = 1.5
+# Image couvrant au moins cette part de la page : fond, placé sous la couche vectorielle
+FULL_PAGE_IMAGE_COVERAGE = 0.90
+
 
 class PDFProcessor:
     """Processeur PDF qui reproduit EXACTEMENT la structure originale avec tableaux corrigés"""
@@ -52,6 +85,32 @@ class PDFProcessor:
         # Pas de facteur d'échelle - on garde les coordonnées PDF exactes
         self.scale_factor = 1.0
 
+        # Classes CSS internées (police/taille/graisse/couleur) du document courant
+        self.styles = StyleRegistry()
+
+        # Sérialiseur HTML compact : coordonnées quantifiées, mode lisible en debug
+        self.html = HtmlEmitter(
+            precision=getattr(settings, 'PDF_HTML_COORD_PRECISION', 0.01),
+            debug=getattr(settings, 'PDF_HTML_DEBUG', False),
+        )
+
+        # Vignettes de pages : dernier rendu de page déjà fait (OCR), réutilisé si possible
+        self.image_processor = ImageProcessor()
+        self.thumbnail_size = getattr(settings, 'PAGE_THUMBNAIL_SIZE', (160, 240))
+        self._page_raster = None
+        # Pages traitées en mode dégradé (budgets de page dépassés) pendant le traitement en cours
+        self.page_reports = []
+        # Budget de la page en cours (PageBudget), contrôlé dans les étapes longues
+        self.page_budget = None
+
+        # Chaîne de traitement du document courant (voir pdf_classifier)
+        self.pipeline = pdf_classifier.HYBRID
+        # Langue(s) Tesseract du document courant (détectée, voir _detect_ocr_language)
+        self.ocr_lang = "eng+fra"
+        # Profil de traitement du document courant et étapes qu'il active (voir processing_profiles)
+        self.profile = processing_profiles.DEFAULT_PROFILE
+        self.stages = processing_profiles.stages(self.profile)
+
         # Flags PyMuPDF pour préserver ligatures & espaces (améliore ≤ ≥ ≠, etc.)
         if PYMUPDF_AVAILABLE:
             self.TEXT_PRESERVE_LIGATURES = getattr(fitz, "TEXT_PRESERVE_LIGATURES", 8)
@@ -63,64 +122,38 @@ class PDFProcessor:
         Remap des glyphes Private Use Area (PUA) fréquemment vus en PDF
         (Symbol/Wingdings/Dingbats) vers l’Unicode standard.
         """
-        if not text:
-            return text
-
-        pua_map = {
-            # opérateurs
-            '\uf0a3': '≤',  # 
-            '\uf0b3': '≥',  # 
-            '\uf0bd': '≠',  # 
-            '\uf0b1': '±',  # 
-            # micro/signes divers rencontrés
-            '\uf06f': 'µ',  #  (souvent map micro/mu selon la fonte)
-            # puces (bullets)
-            '\uf0b7': '•',  #  / bullet Wingdings
-            '\uf0a7': '▪',  #  / small square bullet
-            '\uf0d8': '•',  #  / black circle bullet (selon police)
-            '\uf0fc': '•',  #  variants parfois mappés comme bullets
-            '\uf0e7': '•',  #  (selon fichiers, mieux vaut tomber sur • que laisser PUA)
-        }
-
-        return ''.join(pua_map.get(ch, ch) for ch in text)
+        return normalize_pua_symbols(text)
 
 
-    def _ocr_symbols_from_drawings(self, page, existing_elements, dpi=400):
+    def _ocr_symbols_from_drawings(self, page, existing_elements, dpi=None):
         """
         OCR 'second passe' pour détecter des symboles (≤ ≥ ≠ < > = ± µ μ) présents
         en tant que DESSINS/IMAGES. On masque le texte déjà extrait puis on OCR le reste.
+        Sans 'dpi', la résolution suit la taille du texte de la page (ocr_engine.choose_dpi).
         """
         if not OCR_AVAILABLE:
             return []
 
         try:
-            # 1) Rasterise la page en haute résolution
-            scale = dpi / 72.0
-            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
-            mode = "RGB" if getattr(pix, "n", 3) >= 3 else "L"
-            img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-            if mode == "L":
-                img = img.convert("RGB")
-
+            # 1) Rasterise la page (résolution adaptée à la hauteur des glyphes)
+            if dpi is None:
+                dpi = ocr_engine.choose_dpi(
+                    page.rect.width, page.rect.height,
+                    glyph_height=self._median_glyph_height(existing_elements),
+                    target_px=getattr(settings, 'OCR_SYMBOL_TARGET_GLYPH_PX', 48),
+                )
             # 2) Masque les zones de texte déjà connues (pour ne garder que dessins/images)
-            draw = ImageDraw.Draw(img)
-
-            pw, ph = float(page.rect.width), float(page.rect.height)
-            sx, sy = (pix.width / max(1.0, pw), pix.height / max(1.0, ph))
-
             inflate = 1.5  # petit padding en px PDF autour des bboxes texte
-            for e in existing_elements or []:
-                x0 = max(0, int((e['x0'] - inflate) * sx))
-                y0 = max(0, int((e['y0'] - inflate) * sy))
-                x1 = min(pix.width, int((e['x1'] + inflate) * sx))
-                y1 = min(pix.height, int((e['y1'] + inflate) * sy))
-                draw.rectangle([x0, y0, x1, y1], fill="white")
+            mask = [
+                (e['x0'] - inflate, e['y0'] - inflate, e['x1'] + inflate, e['y1'] + inflate)
+                for e in existing_elements or []
+            ]
 
             # 3) OCR très restreint sur les symboles
             whitelist = (
                 "0123456789"
                 "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
-                " <>==/+-"
+                "<>==/+-"  # sans espace : il couperait l'option -c en deux
                 "≤≥≠±µμ"  # U+2264, U+2265, U+2260, plus/moins, micro
             )
             config = (
@@ -129,38 +162,23 @@ class PDFProcessor:
                     r'-c tessedit_char_whitelist=' + whitelist
             )
 
-            data = pytesseract.image_to_data(
-                img, lang="eng+fra", config=config, output_type=pytesseract.Output.DICT
-            )
-
             found = []
             eid = 10_000_000  # id décalé pour ne pas collisionner
-            for i in range(len(data.get("text", []))):
-                t = (data["text"][i] or "").strip()
-                if not t:
-                    continue
-                try:
-                    conf = float(data.get("conf", ["-1"])[i])
-                except Exception:
-                    conf = -1.0
-                if conf < 70:
+            if self.page_budget is not None:
+                self.page_budget.start_stage('symbol_ocr')
+            for w in self._ocr_raster_words(page, dpi, self.ocr_lang, config, mask=mask, stage='symbol_ocr'):
+                if w["conf"] < 70:
                     continue
 
                 # on garde uniquement les symboles/operateurs
-                if not re.fullmatch(r"[≤≥≠±<>+=\-µμ]{1,2}", t):
+                if not re.fullmatch(r"[≤≥≠±<>+=\-µμ]{1,2}", w["text"]):
                     continue
 
-                # bbox en coords PDF
-                x = float(data["left"][i]) / sx
-                y = float(data["top"][i]) / sy
-                w = float(data["width"][i]) / sx
-                h = float(data["height"][i]) / sy
-
+                h = w["y1"] - w["y0"]
                 found.append({
                     "id": eid,
-                    "text": self._normalize_math_symbols(t),
-                    "bbox": (x, y, x + w, y + h),
-                    "x0": x, "y0": y, "x1": x + w, "y1": y + h,
+                    "text": self._normalize_math_symbols(w["text"]),
+                    "x0": w["x0"], "y0": w["y0"], "x1": w["x1"], "y1": w["y1"],
                     "font": "OCR-SYMBOL",
                     "size": max(8, min(14, h * 0.9)),
                     "flags": 0,
@@ -169,17 +187,26 @@ class PDFProcessor:
                 eid += 1
 
             return found
+        except PageBudgetExceeded:
+            raise
         except Exception as e:
             print(f"OCR drawings failed: {e}")
             return []
 
-    def process(self, file_path, document_instance):
-        """Traite un fichier PDF en conservant la structure EXACTE"""
+    def process(self, file_path, document_instance, checkpoint=None, profile=None):
+        """
+        Traite un fichier PDF en conservant la structure EXACTE.
+        'checkpoint' (voir page_checkpoint) enregistre chaque page terminée et
+        permet de reprendre un traitement interrompu.
+        'profile' (voir processing_profiles) remplace le profil enregistré sur le document.
+        """
         try:
             print(f"Début traitement PDF structural: {file_path}")
 
+            self.profile = processing_profiles.profile_of(document_instance, profile)
+            self.stages = processing_profiles.stages(self.profile)
             if PYMUPDF_AVAILABLE:
-                return self._process_with_exact_structure(file_path, document_instance)
+                return self._process_with_exact_structure(file_path, document_instance, checkpoint)
             elif PDFPLUMBER_AVAILABLE:
                 return self._process_with_pdfplumber_simple(file_path)
             else:
@@ -191,7 +218,7 @@ class PDFProcessor:
             traceback.print_exc()
             return self._process_basic_fallback_with_message(f"Erreur: {str(e)}")
 
-    def _process_with_exact_structure(self, file_path, document_instance):
+    def _process_with_exact_structure(self, file_path, document_instance, checkpoint=None):
         """Reproduction EXACTE de la structure PDF avec tableaux intelligents"""
         doc = None
         try:
@@ -202,31 +229,70 @@ class PDFProcessor:
                 raise ValueError("Document PDF vide")
 
             metadata = doc.metadata or {}
-            content = ""
-            formatted_content = ""
+            self.styles = StyleRegistry()
             images = []
             fonts_used = set()
-
-            # Traiter chaque page avec structure exacte et tableaux intelligents
-            for page_num in range(len(doc)):
+            checkpoint = checkpoint or MemoryCheckpoint()
+            checkpoint.start(len(doc))
+            self._page_raster = None
+            self.page_reports = []
+            self.page_budget = None
+
+            # Choix de la chaîne (natif / OCR / hybride) sur un échantillon de pages
+            self.pipeline = pdf_classifier.classify_document(doc)
+            self.ocr_lang = self._detect_ocr_language(doc, document_instance) if self.stages['ocr'] else ''
+            print(f"Profil: {self.profile}, chaîne de traitement: {self.pipeline}, langue OCR: {self.ocr_lang or '-'}")
+
+            # Reprise : les pages déjà terminées ne sont ni ré-analysées ni re-rendues.
+            # Les classes CSS enregistrées avec elles sont rétablies telles quelles ;
+            # un document commencé avant leur enregistrement rejoue le rendu de ses pages.
+            completed = checkpoint.completed_layouts(len(doc))
+            stored_styles = checkpoint.completed_styles() if completed else None
+            if stored_styles is not None:
+                self.styles = StyleRegistry.from_keys(stored_styles)
+            for layout in completed:
+                if stored_styles is None:
+                    self._render_page_layout(layout)
+                fonts_used.update(self._layout_fonts(layout))
+            if checkpoint.cursor:
+                print(f"Reprise du traitement à la page {checkpoint.cursor + 1}")
+
+            # Traiter chaque page dans l'ordre d'affichage : chaque page enregistrée
+            # (avec le CSS généré jusqu'ici) est aussitôt consultable
+            base_css = self._generate_improved_css()
+            for page_num in range(checkpoint.cursor, len(doc)):
+                page = None
                 try:
                     print(f"Traitement structural page {page_num + 1}...")
                     page = doc[page_num]
 
-                    page_content, page_html, page_images, page_fonts = self._process_page_with_smart_tables(
-                        page, page_num
-                    )
+                    page_content, page_html, page_images, page_fonts, layout = \
+                        self._process_page_with_smart_tables(page, page_num)
 
-                    content += f"\n--- Page {page_num + 1} ---\n{page_content}\n"
-                    formatted_content += page_html
                     images.extend(page_images)
                     fonts_used.update(page_fonts)
+                    # Pas de vignette (rendu de la page) hors budget de pixels
+                    renderable = self.page_budget is None or self.page_budget.can_render
+                    checkpoint.save_page(
+                        page_num, page.rect.width, page.rect.height,
+                        layout, page_html, page_content, page_images,
+                        css=base_css + self.styles.to_css(), styles=self.styles.keys(),
+                        thumbnail=self._page_thumbnail(page) if self.stages['layout'] and renderable else None
+                    )
 
                     print(f"Page {page_num + 1}: {len(page_content)} caractères, {len(page_images)} images")
 
                 except Exception as e:
                     print(f"Erreur page {page_num + 1}: {str(e)}")
-                    continue
+                    # La page reste présente (texte brut) : pas de trou dans le document
+                    self._save_failed_page(checkpoint, page, page_num, base_css)
+
+            # Assemblage à partir des pages stockées
+            content = ""
+            formatted_content = ""
+            for page_number, page_content, page_html in checkpoint.stored_pages():
+                content += self._page_text_block(page_number - 1, page_content)
+                formatted_content += page_html
 
             # Dimensions de la première page (coordonnées PDF exactes)
             first_page = doc[0] if len(doc) > 0 else None
@@ -241,20 +307,24 @@ class PDFProcessor:
 
             result = {
                 'content': content,
-                'formatted_content': f'<div class="pdf-document-exact">{formatted_content}</div>',
+                'formatted_content': self._wrap_document_html(formatted_content),
                 'author': metadata.get('author', ''),
                 'creation_date': self._parse_pdf_date(metadata.get('creationDate')),
                 'modification_date': self._parse_pdf_date(metadata.get('modDate')),
                 'images': images,
+                'images_saved': checkpoint.saves_images,
+                'pipeline': self.pipeline,
+                'ocr_language': self.ocr_lang,
+                'page_reports': self.page_reports,
                 'format_info': {
                     'page_width': page_width,
                     'page_height': page_height,
                     'fonts_used': list(fonts_used),
-                    'has_images': len(images) > 0,
+                    'has_images': len(images) > 0 or checkpoint.has_images(),
                     'has_tables': self._detect_tables_in_content(content),
                     'has_headers': False,
                     'has_footers': False,
-                    'generated_css': self._generate_improved_css()
+                    'generated_css': base_css + self.styles.to_css()
                 }
             }
 
@@ -278,220 +348,658 @@ class PDFProcessor:
         total_chars = sum(len(e.get("text", "")) for e in elements)
         return total_chars < min_chars
 
-    def _ocr_page_to_elements(self, page, dpi=300, lang="eng+fra"):
+    def _ocr_page_to_elements(self, page, dpi=None, lang=None, glyph_height=None):
         """
         Convertit la page en image, passe l'OCR, et retourne une liste d'éléments
         positionnés compatibles avec _extract_all_positioned_elements.
+        Page scannée (une image pleine page) : l'OCR lit directement l'image décodée.
+        Sinon, sans 'dpi', la résolution cible dépend de la hauteur des glyphes et de
+        la résolution native du scan ; une première passe est faite plus bas et seules
+        les lignes peu sûres sont refaites à la résolution cible.
         """
         if not OCR_AVAILABLE:
             return []
 
+        lang = lang or self.ocr_lang
         try:
-            # Rendu bitmap haute def de la page (72dpi -> dpi)
-            scale = dpi / 72.0
-            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
-
-            # Choix du mode selon le nombre de canaux
-            mode = "RGB" if getattr(pix, "n", 3) >= 3 else "L"
-            img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-            if mode == "L":
-                img = img.convert("RGB")
-
-            # OCR au niveau "word" pour récupérer des bbox fines
-            custom = (
-                r'--oem 3 --psm 6 '
-                r'-c preserve_interword_spaces=1 '
-                r'-c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                r'.,;:()[]{}%/+\-–—=<>\u2264\u2265\u2260µμ mgugµgμg '
+            scan = None if dpi else self._load_scan_image(page)
+            if scan is not None:
+                # Page scannée : OCR de l'image elle-même, à sa résolution native
+                # (ni rendu MuPDF ni rééchantillonnage), coordonnées ramenées à la page
+                img, (x0, y0, x1, y1) = scan
+                self._keep_page_raster(page, img)
+                words = ocr_engine.to_page_space(
+                    ocr_engine.ocr_words(img, lang, OCR_PAGE_CONFIG), x0, y0,
+                    (x1 - x0) / float(img.width or 1), (y1 - y0) / float(img.height or 1),
+                )
+                return self._ocr_words_to_elements(words)
+
+            target_dpi = dpi or ocr_engine.choose_dpi(
+                page.rect.width, page.rect.height,
+                glyph_height=glyph_height, native_dpi=self._scan_native_dpi(page),
             )
-            data = pytesseract.image_to_data(img, lang=lang, config=custom, output_type=pytesseract.Output.DICT)
+            pass_dpi = ocr_engine.first_pass_dpi(target_dpi)
 
-            elements = []
-            element_id = 0
+            # OCR au niveau "word" pour récupérer des bbox fines (coordonnées PDF)
+            words = self._ocr_raster_words(page, pass_dpi, lang, OCR_PAGE_CONFIG)
+            if pass_dpi < target_dpi:
+                words = self._reocr_low_confidence(page, words, target_dpi, lang)
 
-            # Échelle image -> coordonnées PDF
-            w_scale = page.rect.width / float(pix.width or 1)
-            h_scale = page.rect.height / float(pix.height or 1)
+            return self._ocr_words_to_elements(words)
+        except PageBudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"OCR failed: {e}")
+            return []
 
-            for i in range(len(data.get("text", []))):
-                raw_text = (data["text"][i] or "").strip()
-                text = self._normalize_math_symbols(raw_text)
+    def _detect_ocr_language(self, doc, document_instance=None):
+        """
+        Langue OCR du document, parmi OCR_LANGUAGES : d'après la couche texte des
+        pages échantillonnées, ou (chaîne OCR) d'après un OCR rapide basse résolution
+        d'une page. Une reprise réutilise la langue déjà enregistrée.
+        Sans détection concluante, toutes les langues candidates sont gardées.
+        """
+        stored = getattr(document_instance, 'ocr_language', '')
+        if stored:
+            return stored
 
-                conf_raw = data.get("conf", ["-1"] * len(data["text"]))[i]
-                try:
-                    conf = float(conf_raw)
-                except:
-                    conf = -1.0
+        candidates = ocr_engine.language_candidates()
+        default = '+'.join(candidates)
+        if len(candidates) <= 1:
+            return default
 
-                if not text or conf < 60:  # filtre mots OCR peu fiables
-                    continue
+        indices = pdf_classifier.sample_indices(len(doc))
+        try:
+            if self.pipeline != pdf_classifier.OCR:
+                text = ' '.join(doc[i].get_text("text") for i in indices)
+            elif OCR_AVAILABLE:
+                page = doc[indices[len(indices) // 2]]
+                words = self._ocr_raster_words(page, getattr(settings, 'OCR_MIN_DPI', 150), default, r'--oem 3 --psm 3')
+                text = ' '.join(w["text"] for w in words)
+            else:
+                return default
+        except Exception as e:
+            print(f"Détection de langue impossible: {e}")
+            return default
 
-                x = float(data["left"][i]) * w_scale
-                y = float(data["top"][i]) * h_scale
-                w = float(data["width"][i]) * w_scale
-                h = float(data["height"][i]) * h_scale
-
-                elements.append({
-                    "id": element_id,
-                    "text": text,
-                    "bbox": (x, y, x + w, y + h),
-                    "x0": x, "y0": y, "x1": x + w, "y1": y + h,
-                    "font": "OCR",
-                    "size": max(8, min(12, h * 0.9)),  # taille approx pour lisibilité
-                    "flags": 0,
-                    "color": 0,
-                })
-                element_id += 1
+        return ocr_engine.detect_language(text, candidates) or default
 
-            return elements
-        except Exception as e:
-            print(f"OCR failed: {e}")
+    def _render_for_ocr(self, page, dpi, clip=None, mask=None, thumbnail=None):
+        """
+        Rendu en niveaux de gris de la page (ou de la zone 'clip') à 'dpi'. L'image PIL
+        lit directement les pixels du pixmap (frombuffer, sans copie) ; les bbox de
+        'mask' (coordonnées page) sont effacées en blanc dans le pixmap.
+        'thumbnail' (voir _thumbnail_canvas) reçoit, avant masquage, une copie réduite
+        du rendu collée à sa place dans la page.
+        """
+        scale = dpi / 72.0
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, colorspace=fitz.csGRAY, alpha=False)
+        samples = pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+        img = Image.frombuffer("L", (pix.width, pix.height), samples, "raw", "L", pix.stride, 1)
+        if thumbnail is not None:
+            top = (clip.y0 if clip is not None else page.rect.y0) - page.rect.y0
+            piece = self.image_processor.reduced_copy(img, (thumbnail.width, thumbnail.height))
+            thumbnail.paste(piece, (0, round(top * thumbnail.height / max(page.rect.height, 1))))
+        for x0, y0, x1, y1 in mask or ():
+            pix.set_rect(fitz.IRect(int(x0 * scale), int(y0 * scale), int(x1 * scale) + 1, int(y1 * scale) + 1), (255,))
+        img.pixmap = pix  # les pixels de l'image sont ceux du pixmap : il doit vivre aussi longtemps
+        return img
+
+    def _ocr_raster_words(self, page, dpi, lang, config, clip=None, mask=None, stage=None):
+        """
+        Mots OCR (coordonnées page) de la page ou de la zone 'clip' rendue à 'dpi'.
+        Au-delà de OCR_TILE_PIXELS, la zone est rendue et lue par bandes horizontales
+        qui se chevauchent (ocr_engine.raster_bands) : un seul rendu à la fois en mémoire.
+        Le budget de la page en cours (self.page_budget) est contrôlé avant chaque bande ;
+        hors limite de l'étape 'stage', les bandes restantes ne sont pas lues.
+        """
+        area = clip or page.rect
+        bands = ocr_engine.raster_bands(area.y0, area.y1, area.x1 - area.x0, dpi)
+        # page entière : ses bandes composent aussi la vignette de la page
+        thumbnail = self._thumbnail_canvas(page) if clip is None else None
+        words = []
+        for index, (top, bottom, core_top, core_bottom) in enumerate(bands):
+            if self.page_budget is not None:
+                self.page_budget.check_deadline("l'OCR")
+                if stage and self.page_budget.check_stage(stage):
+                    break
+            band = clip if len(bands) == 1 else fitz.Rect(area.x0, top, area.x1, bottom)
+            img = self._render_for_ocr(page, dpi, clip=band, mask=mask, thumbnail=thumbnail)
+            for w in ocr_engine.to_page_space(
+                ocr_engine.ocr_words(img, lang, config), area.x0, top,
+                (area.x1 - area.x0) / float(img.width or 1), (bottom - top) / float(img.height or 1),
+            ):
+                if core_top <= (w["y0"] + w["y1"]) / 2.0 < core_bottom:
+                    if len(bands) > 1:
+                        w["line"] = (index,) + w["line"]
+                    words.append(w)
+            del img  # libère le pixmap avant le rendu de la bande suivante
+        else:
+            if thumbnail is not None:
+                self._page_raster = (page.number, thumbnail)
+        return words
+
+    def _reocr_low_confidence(self, page, words, dpi, lang):
+        """
+        Refait à 'dpi' les lignes dont un mot est sous OCR_RETRY_CONFIDENCE ; la
+        nouvelle lecture d'une ligne n'est gardée que si sa confiance moyenne est meilleure.
+        """
+        threshold = getattr(settings, 'OCR_RETRY_CONFIDENCE', 75)
+        regions = ocr_engine.low_confidence_lines(words, threshold)
+        if not regions:
+            return words
+
+        page_w, page_h = page.rect.width, page.rect.height
+        if len(regions) > getattr(settings, 'OCR_MAX_RETRY_REGIONS', 40):
+            # Trop de lignes douteuses : une seule passe complète à la résolution cible
+            retry = self._ocr_raster_words(page, dpi, lang, OCR_PAGE_CONFIG)
+            return retry if ocr_engine.mean_confidence(retry) > ocr_engine.mean_confidence(words) else words
+
+        replaced, skipped = {}, set()
+        pad = 2.0
+        for (x0, y0, x1, y1), indices in regions:
+            clip = fitz.Rect(max(0.0, x0 - pad), max(0.0, y0 - pad), min(page_w, x1 + pad), min(page_h, y1 + pad))
+            line_words = self._ocr_raster_words(page, dpi, lang, OCR_LINE_CONFIG, clip=clip)
+            old_words = [words[i] for i in indices]
+            if line_words and ocr_engine.mean_confidence(line_words) > ocr_engine.mean_confidence(old_words):
+                for w in line_words:
+                    w["line"] = old_words[0]["line"]
+                replaced[indices[0]] = line_words
+                skipped.update(indices)
+
+        if replaced:
+            print(f"  -> OCR: {len(replaced)}/{len(regions)} ligne(s) relue(s) à {dpi} dpi")
+        result = []
+        for i, w in enumerate(words):
+            result.extend(replaced.get(i, ()))
+            if i not in skipped:
+                result.append(w)
+        return result
+
+    def _ocr_words_to_elements(self, words, min_conf=60, first_id=0, font="OCR"):
+        """Mots OCR (coordonnées page) -> éléments texte ; les mots peu fiables sont filtrés."""
+        elements = []
+        for w in words:
+            text = self._normalize_math_symbols(w["text"])
+            if not text or w["conf"] < min_conf:
+                continue
+            h = w["y1"] - w["y0"]
+            elements.append({
+                "id": first_id + len(elements),
+                "text": text,
+                "x0": w["x0"], "y0": w["y0"], "x1": w["x1"], "y1": w["y1"],
+                "font": font,
+                "size": max(8, min(12, h * 0.9)),  # taille approx pour lisibilité
+                "flags": 0,
+                "color": 0,
+            })
+        return elements
+
+    def _ocr_candidate_regions(self, page, elements):
+        """
+        Zones d'images affichées (hors images pleine page) qu'aucun texte natif ne
+        recoupe : (bbox, dpi natif), les plus grandes d'abord, au plus OCR_MAX_REGIONS.
+        Les petites images (icônes, puces) sont ignorées.
+        """
+        if not OCR_AVAILABLE:
+            return []
+        try:
+            infos = page.get_image_info()
+        except Exception:
             return []
 
+        page_w, page_h = page.rect.width, page.rect.height
+        page_area = max(page_w * page_h, 1.0)
+        min_side = getattr(settings, 'OCR_REGION_MIN_SIZE', 48)
+        full_page = getattr(settings, 'OCR_SCAN_COVERAGE', 0.9)
+        text_index = SpatialIndex([(e["x0"], e["y0"], e["x1"], e["y1"]) for e in elements])
+
+        regions, seen = [], set()
+        for info in infos:
+            x0, y0, x1, y1 = info.get("bbox", (0, 0, 0, 0))
+            x0, y0, x1, y1 = max(0.0, x0), max(0.0, y0), min(page_w, x1), min(page_h, y1)
+            bbox = (round(x0, 1), round(y0, 1), round(x1, 1), round(y1, 1))
+            if x1 - x0 < min_side or y1 - y0 < min_side or bbox in seen:
+                continue
+            if (x1 - x0) * (y1 - y0) >= full_page * page_area or text_index.overlapping(bbox):
+                continue
+            seen.add(bbox)
+            native_dpi = info["width"] * 72.0 / (x1 - x0) if info.get("width") else None
+            regions.append(((x0, y0, x1, y1), native_dpi))
+
+        regions.sort(key=lambda r: (r[0][2] - r[0][0]) * (r[0][3] - r[0][1]), reverse=True)
+        return regions[:getattr(settings, 'OCR_MAX_REGIONS', 8)]
+
+    def _ocr_regions_to_elements(self, page, regions, elements):
+        """OCR de chaque zone (rendu de la zone seule), mots regroupés en lignes, police OCR_REGION_FONT."""
+        glyph_height = self._median_glyph_height(elements)
+        words = []
+        if self.page_budget is not None:
+            self.page_budget.start_stage('region_ocr')
+        for (x0, y0, x1, y1), native_dpi in regions:
+            # hors limite de l'étape, les zones restantes (les plus petites) sont ignorées
+            if self.page_budget is not None and self.page_budget.check_stage('region_ocr'):
+                break
+            try:
+                dpi = ocr_engine.choose_dpi(x1 - x0, y1 - y0, glyph_height=glyph_height, native_dpi=native_dpi)
+                words.extend(self._ocr_raster_words(
+                    page, dpi, self.ocr_lang, OCR_REGION_CONFIG, clip=fitz.Rect(x0, y0, x1, y1), stage='region_ocr'
+                ))
+            except PageBudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"  OCR de zone échoué: {e}")
+
+        first_id = max((e["id"] for e in elements), default=-1) + 1
+        region_elems = self._ocr_words_to_elements(words, first_id=first_id, font=OCR_REGION_FONT)
+        return self._merge_line_spans(region_elems, max_gap_factor=1.0, match_size=False)
+
+    def _scan_image_info(self, page, min_coverage):
+        """Plus grande image de la page (get_image_info) couvrant au moins 'min_coverage' de sa surface."""
+        try:
+            infos = page.get_image_info(xrefs=True)
+        except Exception:
+            return None
+        page_area = max(page.rect.width * page.rect.height, 1.0)
+        best, best_area = None, 0.0
+        for info in infos:
+            x0, y0, x1, y1 = info.get("bbox", (0, 0, 0, 0))
+            area = (x1 - x0) * (y1 - y0)
+            if x1 <= x0 or y1 <= y0 or area < min_coverage * page_area or not info.get("width"):
+                continue
+            if area > best_area:
+                best, best_area = info, area
+        return best
+
+    def _scan_native_dpi(self, page):
+        """Résolution native (dpi) de la plus grande image couvrant au moins la moitié de la page."""
+        info = self._scan_image_info(page, 0.5)
+        if not info:
+            return None
+        x0, _, x1, _ = info["bbox"]
+        return info["width"] * 72.0 / (x1 - x0)
+
+    def _load_scan_image(self, page):
+        """
+        Image d'une page scannée (une image couvrant la page, ni tournée ni retournée),
+        décodée directement depuis le PDF (extract_image) : (image PIL, bbox) ou None
+        (pas un scan simple, ou format que Pillow ne décode pas comme JBIG2).
+        """
+        if getattr(page, "rotation", 0):
+            return None
+        info = self._scan_image_info(page, getattr(settings, 'OCR_SCAN_COVERAGE', 0.9))
+        if not info or not info.get("xref"):
+            return None
+        a, b, c, d = tuple(info.get("transform") or (1, 0, 0, 1, 0, 0))[:4]
+        if abs(b) > 1e-3 or abs(c) > 1e-3 or a <= 0 or d <= 0:
+            return None
+
+        # Budget de pixels : seule exception au traitement à la résolution native.
+        # La taille est lue dans l'en-tête, avant décodage : un JPEG trop grand est
+        # décodé directement à une échelle réduite (draft), sans passer par la pleine taille.
+        max_pixels = getattr(settings, 'OCR_MAX_PIXELS', 25_000_000)
+        try:
+            img = Image.open(io.BytesIO(page.parent.extract_image(info["xref"])["image"]))
+            if img.width * img.height > max_pixels:
+                f = (max_pixels / float(img.width * img.height)) ** 0.5
+                img.draft(img.mode if img.mode in ("RGB", "L") else None, (int(img.width * f), int(img.height * f)))
+            img.load()
+        except Exception as e:
+            print(f"  Image de scan non décodable ({e}) : rendu de la page pour l'OCR")
+            return None
+
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("L" if img.mode in ("1", "LA", "I", "I;16") else "RGB")
+        if img.width * img.height > max_pixels:
+            f = (max_pixels / float(img.width * img.height)) ** 0.5
+            img = self.image_processor.reduced_copy(img, (int(img.width * f), int(img.height * f)))
+        return img, tuple(info["bbox"])
+
+    def _embedded_image_pixels(self, page):
+        """Pixels (décodés) de toutes les images placées sur la page."""
+        try:
+            return sum(info.get("width", 0) * info.get("height", 0) for info in page.get_image_info())
+        except Exception:
+            return 0
+
+    def _median_glyph_height(self, elements):
+        sizes = sorted(e.get("size", 0) for e in elements or [] if e.get("size"))
+        return sizes[len(sizes) // 2] if sizes else None
+
+    def _keep_page_raster(self, page, img):
+        """Garde une réduction d'une image de la page lue par l'OCR (scan décodé ou rendu), pour sa vignette."""
+        if self._page_raster is None or self._page_raster[0] != page.number:
+            self._page_raster = (page.number, self.image_processor.reduced_copy(img, self.thumbnail_size))
+
+    def _thumbnail_canvas(self, page):
+        """
+        Vignette vierge (niveaux de gris, taille de vignette) de la page, à composer à
+        partir des rendus OCR ; None si la page a déjà son image ou sans vignettes.
+        """
+        if not getattr(settings, 'PAGE_THUMBNAILS', True):
+            return None
+        if self._page_raster is not None and self._page_raster[0] == page.number:
+            return None
+        width, height = self.thumbnail_size
+        ratio = min(width / max(page.rect.width, 1), height / max(page.rect.height, 1))
+        return Image.new("L", (max(1, round(page.rect.width * ratio)), max(1, round(page.rect.height * ratio))), 255)
+
+    def _page_thumbnail(self, page):
+        """
+        Vignette de la page (WebP, ou JPEG si Pillow n'a pas libwebp) : réutilise
+        l'image de la page déjà lue par l'OCR s'il y en a une (scan décodé, ou rendu
+        en niveaux de gris de l'OCR pleine page ou des symboles), sinon un pixmap
+        basse résolution.
+        Retourne {'data', 'ext'} ou None.
+        """
+        raster, self._page_raster = self._page_raster, None
+        if not getattr(settings, 'PAGE_THUMBNAILS', True):
+            return None
+        try:
+            if raster is not None and raster[0] == page.number:
+                img = raster[1]
+            else:
+                width, height = self.thumbnail_size
+                scale = min(width / max(page.rect.width, 1), height / max(page.rect.height, 1))
+                pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+                img = self.image_processor.pixmap_to_image(pix)
+
+            img_format = self.image_processor.thumbnail_format(getattr(settings, 'PAGE_THUMBNAIL_FORMAT', 'WEBP'))
+            data = self.image_processor.create_thumbnail(
+                img, self.thumbnail_size, img_format=img_format,
+                quality=getattr(settings, 'PAGE_THUMBNAIL_QUALITY', 60)
+            )
+        except Exception as e:
+            print(f"Vignette page {page.number + 1} impossible: {e}")
+            return None
+        if not data:
+            return None
+        return {'data': data, 'ext': 'webp' if img_format == 'WEBP' else 'jpg'}
+
     def _process_page_with_smart_tables(self, page, page_num):
         """
         Traite une page avec détection intelligente des tableaux sans reconstruire
         de sous-tableaux: on ne 'snap' que sur les grilles vectorielles existantes.
         Si la page n'a pas de texte (scan), fallback OCR pour obtenir du texte sélectionnable.
         + OCR ciblé symboles (≤ ≥ ≠ etc.) quand ils sont des dessins/images.
+        Retourne aussi le layout de la page, qui permet de régénérer le HTML sans le PDF.
+        """
+        self.page_budget = None
+        if not self.stages['layout']:
+            # Profil texte seul : texte brut de la page, sans analyse de la mise en page
+            layout = self._fallback_layout(page, page_num)
+            content, page_html, fonts = self._render_page_layout(layout)
+            return content, page_html, [], fonts, layout
+
+        budget = self.page_budget = PageBudget()
+        try:
+            layout, images = self._analyze_page(page, page_num, budget)
+            content, page_html, fonts = self._render_page_layout(layout)
+        except PageBudgetExceeded:
+            layout, images = self._fallback_layout(page, page_num), []
+            content, page_html, fonts = self._render_page_layout(layout)
+        except Exception as e:
+            print(f"    Erreur traitement intelligent: {e}")
+            layout, images = self._fallback_layout(page, page_num), []
+            content, page_html, fonts = self._render_page_layout(layout)
+
+        report = budget.report()
+        if report:
+            self.page_reports.append({'page_number': page_num + 1, **report})
+        return content, page_html, images, fonts, layout
+
+    def _analyze_page(self, page, page_num, budget=None):
         """
+        Partie coûteuse du traitement d'une page (texte, OCR, grilles, images, vectoriel).
+        Retourne (layout, images) : le layout est la représentation intermédiaire
+        sérialisable (voir page_layout), les images sont celles à enregistrer.
+        'budget' (PageBudget) est contrôlé entre les étapes : une page hors budget
+        perd l'OCR des symboles, puis sa couche vectorielle passe en image, puis
+        PageBudgetExceeded est levée (texte brut).
+        Les étapes désactivées par le profil (self.stages) sont sautées.
+        """
+        budget = budget or PageBudget()
+        self.page_budget = budget
+        stages = self.stages
         page_rect = page.rect
         page_width = page_rect.width
         page_height = page_rect.height
 
         print(f"  Traitement intelligent page {page_num + 1}: {page_width} x {page_height}")
 
-        content = ""
-        images = []
-        fonts = set()
         ocr_used = False
+        layout = {
+            'page': page_num,
+            'width': page_width,
+            'height': page_height,
+            'ocr': False,
+            'symbols': [],
+            'grids': [],
+            'elements': [],
+            'images': [],
+            'vector': {'strategy': 'none'},
+        }
 
-        page_html = f'''
-        <div class="pdf-page-exact" data-page="{page_num + 1}" style="
-            position: relative;
-            width: {page_width}px;
-            height: {page_height}px;
-            margin: 20px auto;
-            background: white;
-            border: 1px solid #ccc;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            overflow: visible;
-        ">
-        '''
-
-        try:
-            # 0) Overlay SVG pour conserver dessins/tracés vectoriels (sans texte)
-            page_html += self._render_svg_overlay(page)
-
-            # 1) Texte positionné natif (avec ligatures/espaces préservés)
+        # 0) Géométrie vectorielle extraite une seule fois (grilles, filets, symboles dessinés)
+        if stages['grids'] or stages['vectors'] or stages['symbol_ocr']:
+            # au-delà de 10x le budget de tracés la page passe en texte brut : inutile d'en lire plus
+            geometry = PageGeometry.from_page(page, max_items=budget.max_paths * 10)
+        else:
+            geometry = PageGeometry()
+        budget.check_geometry(geometry.item_count)
+        budget.check_images(self._embedded_image_pixels(page))
+        if geometry.paths and stages['symbol_ocr'] and budget.allows(NO_SYMBOL_OCR):
+            layout['symbols'] = self._extract_math_symbols(geometry, page, budget)
+
+        # 1) Texte positionné natif (avec ligatures/espaces préservés).
+        # Chaîne OCR : une page sans police n'a pas de couche texte, inutile de l'extraire
+        if self.pipeline == pdf_classifier.OCR and not page.get_fonts():
+            all_elements = []
+        else:
             text_dict = self._extract_text_dict_with_flags(page)
             all_elements = self._extract_all_positioned_elements(text_dict)
 
-            # 1.b) Fallback OCR si (quasi) pas de texte natif
-            if (not all_elements or self._should_ocr(all_elements)):
-                ocr_elems = self._ocr_page_to_elements(page, dpi=300, lang="eng+fra")
-                if ocr_elems:
-                    print("  -> OCR utilisé (page sans couche texte ou très peu de texte).")
-                    all_elements = ocr_elems
-                    ocr_used = True
-
-            # 1.c) Fusion des paires de spans pour composer ≤ ≥ ≠ si nécessaire
-            all_elements = self._merge_math_pairs(all_elements)
-
-            # 1.d) OCR ciblé des symboles présents en dessins/images
-            symbol_elems = self._ocr_symbols_from_drawings(page, all_elements, dpi=400)
-            if symbol_elems:
-                # éviter les doublons: on n’ajoute que si pas déjà recouvert par un span texte
-                def _overlap(a, b):
-                    ax0, ay0, ax1, ay1 = a["x0"], a["y0"], a["x1"], a["y1"]
-                    bx0, by0, bx1, by1 = b["x0"], b["y0"], b["x1"], b["y1"]
-                    ix0, iy0 = max(ax0, bx0), max(ay0, by0)
-                    ix1, iy1 = min(ax1, bx1), min(ay1, by1)
-                    if ix1 <= ix0 or iy1 <= iy0:
-                        return 0.0
-                    inter = (ix1 - ix0) * (iy1 - iy0)
-                    area = (ax1 - ax0) * (ay1 - ay0)
-                    return inter / max(area, 1e-6)
-
-                merged = []
-                for s in symbol_elems:
-                    if any(_overlap(s, e) > 0.4 for e in all_elements):
-                        continue
-                    merged.append(s)
-                if merged:
-                    all_elements = all_elements + merged
-
-            # 2) Primitives vectorielles existantes (grilles / cadres)
-            H, V, RECTS = self._collect_vector_primitives(page)
-
-            # 3) Détection des zones susceptibles d'être des tableaux (via le texte)
-            table_zones = self._detect_smart_table_zones(all_elements)
-
-            processed_elements = set()
-            grid_bboxes = []  # on accumule les zones où une grille vectorielle existe
-
-            for zone in table_zones:
-                # BBox de la zone
-                min_x = min(e['x0'] for e in zone)
-                max_x = max(e['x1'] for e in zone)
-                min_y = min(e['y0'] for e in zone)
-                max_y = max(e['y1'] for e in zone)
-                zone_bbox = (min_x, min_y, max_x, max_y)
-
-                # (A) Si une grille vectorielle existe -> 'snap' le texte dans les cellules
-                if self._zone_has_vector_grid(zone_bbox, H, V, RECTS):
-                    cell_html, consumed_ids = self._render_grid_cells_with_text(zone_bbox, zone, H, V)
-                    page_html += cell_html
-                    processed_elements.update(consumed_ids)
-                    grid_bboxes.append(zone_bbox)
-                    continue
-                # (B) Reconstruction désactivée : NE PAS créer de <table> synthétique.
-
-            # 4) Rendu du texte restant (éléments non consommés par le 'snap')
-            remaining = [e for e in all_elements if e['id'] not in processed_elements]
-            # ordre visuel constant
-            remaining.sort(key=lambda e: (e['y0'], e['x0']))
-            for element in remaining:
-                elem_html = self._render_single_element(element, page_height)
-                page_html += elem_html
-                content += element['text'] + " "
-                fonts.add(element.get('font', ''))
-
-            # 5) Images matricielles (XObjects)
-            if not ocr_used:
-                images = self._extract_images_with_positions(page, page_num, page_height)
-                for image_data in images:
-                    if image_data.get('coverage', 0) >= 0.90:
-                        continue
-                    page_html += f'''
-                    <img class="pdf-image-exact" 
-                         src="data:image/{image_data['format']};base64,{image_data['base64']}" 
-                         style="
-                             position: absolute;
-                             left: {image_data['x']}px;
-                             top: {image_data['y']}px;
-                             width: {image_data['width']}px;
-                             height: {image_data['height']}px;
-                             border: none;
-                             z-index: 0;
-                             pointer-events: none;
-                         "
-                         alt="{image_data['name']}" />
-                    '''
-
-            # 6) Rendu léger des grilles/cadres résiduels (filet)
-            page_html += self._render_drawings(page, grid_bboxes)
+        # 1.b) Fallback OCR si (quasi) pas de texte natif ; si le peu de texte natif
+        # s'explique par des images sans texte, seules ces zones passent à l'OCR (1.c ter).
+        # Pas de rendu pour l'OCR si la page embarque des images hors budget de pixels.
+        # Chaîne native : pas de zones d'image à lire, et une page sans texte ni image
+        # (blanche ou de dessins) n'est pas rendue pour l'OCR
+        budget.check_time("l'OCR")
+        can_ocr = stages['ocr'] and budget.can_render
+        native = self.pipeline == pdf_classifier.NATIVE
+        ocr_regions = []
+        if can_ocr and all_elements and not native:
+            ocr_regions = self._ocr_candidate_regions(page, all_elements)
+        needs_ocr = can_ocr and (not all_elements or (self._should_ocr(all_elements) and not ocr_regions))
+        if needs_ocr and (not native or page.get_images()):
+            ocr_elems = self._ocr_page_to_elements(
+                page, glyph_height=self._median_glyph_height(all_elements)
+            )
+            if ocr_elems:
+                print("  -> OCR utilisé (page sans couche texte ou très peu de texte).")
+                all_elements = ocr_elems
+                ocr_used = True
+        layout['ocr'] = ocr_used
+
+        # 1.c) Fusion des paires de spans pour composer ≤ ≥ ≠ si nécessaire
+        all_elements = self._merge_math_pairs(all_elements)
+
+        # 1.c bis) Regroupement des spans (ou mots OCR) d'une même ligne en un seul élément
+        if ocr_used:
+            all_elements = self._merge_line_spans(all_elements, max_gap_factor=1.0, match_size=False)
+        else:
+            all_elements = self._merge_line_spans(all_elements)
+
+        # 1.c ter) OCR des seules zones d'images sans texte natif, ajouté au texte natif
+        if ocr_regions and not ocr_used:
+            region_elems = self._ocr_regions_to_elements(page, ocr_regions, all_elements)
+            if region_elems:
+                print(f"  -> OCR de {len(ocr_regions)} zone(s) d'image : {len(region_elems)} élément(s)")
+                all_elements = all_elements + region_elems
+
+        # 1.d) OCR ciblé des symboles présents en dessins/images (inutile sans dessin ni image,
+        # et sur une page de scan déjà entièrement passée à l'OCR)
+        symbol_elems = []
+        scan_page_done = ocr_used and self.pipeline == pdf_classifier.OCR
+        budget.check_time("l'OCR des symboles")
+        if not scan_page_done and stages['symbol_ocr'] and budget.allows(NO_SYMBOL_OCR) and (not geometry.is_empty() or page.get_images()):
+            symbol_elems = self._ocr_symbols_from_drawings(page, all_elements)
+        # Vue colonnaire des éléments, construite une fois pour la page : dédoublonnage
+        # des symboles, détection des tableaux et tri visuel
+        store = ElementStore.from_dicts(all_elements)
+        if symbol_elems:
+            # éviter les doublons: on n’ajoute que si pas déjà recouvert par un span texte
+            covered = store.covered(
+                [(s["x0"], s["y0"], s["x1"], s["y1"]) for s in symbol_elems], 0.4
+            )
+            merged = [s for s, is_covered in zip(symbol_elems, covered) if not is_covered]
+            if merged:
+                all_elements = all_elements + merged
+                store.extend(merged)
+
+        # 3) Détection des zones susceptibles d'être des tableaux (via le texte)
+        table_zones = self._detect_smart_table_zones(all_elements, store) if stages['grids'] else []
+
+        processed_elements = set()
+        grid_bboxes = []  # on accumule les zones où une grille vectorielle existe
+
+        for zone in table_zones:
+            # BBox de la zone
+            min_x = min(e['x0'] for e in zone)
+            max_x = max(e['x1'] for e in zone)
+            min_y = min(e['y0'] for e in zone)
+            max_y = max(e['y1'] for e in zone)
+            zone_bbox = (min_x, min_y, max_x, max_y)
+
+            # (A) Si une grille vectorielle existe -> 'snap' le texte dans les cellules
+            if self._zone_has_vector_grid(zone_bbox, geometry):
+                grid, consumed_ids = self._snap_zone_to_grid(zone_bbox, zone, geometry)
+                if grid:
+                    layout['grids'].append(grid)
+                processed_elements.update(consumed_ids)
+                grid_bboxes.append(zone_bbox)
+                continue
+            # (B) Reconstruction désactivée : NE PAS créer de <table> synthétique.
 
-        except Exception as e:
-            print(f"    Erreur traitement intelligent: {e}")
-            return self._fallback_simple_extraction(page, page_num)
+        # 4) Texte restant (éléments non consommés par le 'snap'), en ordre visuel constant
+        layout['elements'] = [all_elements[i] for i in store.order('y0', 'x0')
+                              if all_elements[i]['id'] not in processed_elements]
+
+        # 5) Images matricielles (XObjects), y compris les images pleine page (fond)
+        images = []
+        if not ocr_used and stages['images']:
+            images = self._extract_images_with_positions(page, page_num, page_height, max_pixels=budget.max_pixels)
+            layout['images'] = [
+                {k: v for k, v in image_data.items() if k != 'base64'}
+                for image_data in images
+            ]
+
+        # 6) Une seule stratégie de rendu vectoriel par page (SVG, filets div ou raster)
+        if stages['vectors']:
+            budget.check_time("la couche vectorielle")
+            budget.start_stage('vectors')
+            layout['vector'] = self._analyze_vector_layer(
+                page, geometry, grid_bboxes, keep_svg_images=ocr_used,
+                force_raster=not budget.allows(RASTER_VECTORS), can_render=budget.can_render
+            )
+
+        return layout, images
+
+    def _render_page_layout(self, layout):
+        """Génère (texte, HTML, polices) d'une page à partir de son layout, sans ouvrir le PDF."""
+        if 'fallback' in layout:
+            return self._render_fallback_layout(layout)
+
+        page_width, page_height = layout['width'], layout['height']
+        content_parts = []
+
+        page_html = self.html.open_tag(
+            'div', 'pdf-page-exact',
+            self.html.style(('width', self.html.px(page_width)), ('height', self.html.px(page_height))),
+            {'data-page': layout['page'] + 1}
+        )
+
+        for x0, y0, text in layout['symbols']:
+            page_html += self.html.element('div', text, 'math-symbol-ocr', self.html.box(x0, y0))
+        vector_slot = len(page_html)
+
+        for grid in layout['grids']:
+            page_html += self._render_grid_cells(grid)
+            # le texte des cellules fait partie du texte de la page (recherche, aperçu)
+            for _, _, cell_spans in grid['cells']:
+                content_parts.extend(span['text'] for span in cell_spans)
+
+        for element in layout['elements']:
+            page_html += self._render_single_element(element, page_height)
+            content_parts.append(element['text'])
+
+        # Les images pleine page sont un fond : placées avant la couche vectorielle ;
+        # les autres images viennent après (un fond rempli ne les recouvre pas)
+        background_html = ""
+        for image_data in layout['images']:
+            image_html = self.html.void(
+                'img', 'pdf-image-exact',
+                self.html.box(image_data['x'], image_data['y'], image_data['width'], image_data['height']),
+                {'src': f"data:image/{image_data['format']};base64,{base64.b64encode(image_data['data']).decode()}",
+                 'alt': image_data['name']}
+            )
+            if image_data.get('coverage', 0) >= FULL_PAGE_IMAGE_COVERAGE:
+                background_html += image_html
+            else:
+                page_html += image_html
+
+        vector_html = self._render_vector_layer(layout['vector'], page_width, page_height)
+        page_html = page_html[:vector_slot] + background_html + vector_html + page_html[vector_slot:]
+
+        page_html += self.html.close_tag('div')
+        if self.html.debug:
+            print(f"  HTML page {layout['page'] + 1}: {len(page_html.encode('utf-8'))} octets")
+
+        # Textes déjà normalisés à l'extraction : simple assemblage
+        return " ".join(content_parts), page_html, self._layout_fonts(layout)
+
+    def _layout_fonts(self, layout):
+        """Polices des éléments et des cellules de grille d'un layout (aucune pour un layout de secours)."""
+        if 'fallback' in layout:
+            return set()
+        fonts = {element.get('font', '') for element in layout['elements']}
+        for grid in layout['grids']:
+            for _, _, cell_spans in grid['cells']:
+                fonts.update(span.get('font', '') for span in cell_spans)
+        return fonts
+
+    def render_layouts(self, layouts):
+        """
+        Régénère le document complet (texte, HTML, polices, CSS) à partir des layouts
+        de pages stockés, sans le PDF (commande rerender_documents).
+        """
+        self.styles = StyleRegistry()
+        content = ""
+        formatted_content = ""
+        fonts_used = set()
+        pages = []
 
-        page_html += '</div>'
+        for layout in layouts:
+            page_content, page_html, page_fonts = self._render_page_layout(layout)
+            content += self._page_text_block(layout['page'], page_content)
+            formatted_content += page_html
+            fonts_used.update(page_fonts)
+            pages.append((page_content, page_html))
 
-        # Normalisation finale de sécurité (<= -> ≤, >= -> ≥ …) pour le texte agrégé
-        content = self._normalize_math_symbols(content)
+        return {
+            'content': content,
+            'formatted_content': self._wrap_document_html(formatted_content),
+            'fonts_used': list(fonts_used),
+            'generated_css': self._generate_improved_css() + self.styles.to_css(),
+            'style_classes': self.styles.keys(),
+            'pages': pages,
+        }
 
-        return content, page_html, images, fonts
+    def _page_text_block(self, page_num, page_content):
+        return f"\n--- Page {page_num + 1} ---\n{page_content}\n"
+
+    def _wrap_document_html(self, formatted_content):
+        return f'<div class="pdf-document-exact">{formatted_content}</div>'
 
     # ======== NOUVEAU : extraction dict avec flags (ligatures ≤ ≥ ≠, etc.) ========
     def _extract_text_dict_with_flags(self, page):
@@ -502,11 +1010,13 @@ class PDFProcessor:
         except Exception:
             return page.get_text("dict")
 
-    def _compute_grid_from_lines(self, bbox, H, V, tol=1.0):
+    def _compute_grid_from_lines(self, bbox, geometry, tol=1.0):
         """Calcule les bords de colonnes/lignes à partir des segments H/V dans 'bbox'."""
         x0, y0, x1, y1 = bbox
-        H_in = [h for h in H if (y0 - tol <= h[1] <= y1 + tol) and (max(0, min(h[2], x1) - max(h[0], x0)) > 5)]
-        V_in = [v for v in V if (x0 - tol <= v[0] <= x1 + tol) and (max(0, min(v[3], y1) - max(v[1], y0)) > 5)]
+        H_in = [h for h in geometry.h_index.query((x0, y0 - tol, x1, y1 + tol))
+                if (y0 - tol <= h[1] <= y1 + tol) and (max(0, min(h[2], x1) - max(h[0], x0)) > 5)]
+        V_in = [v for v in geometry.v_index.query((x0 - tol, y0, x1 + tol, y1))
+                if (x0 - tol <= v[0] <= x1 + tol) and (max(0, min(v[3], y1) - max(v[1], y0)) > 5)]
 
         x_candidates = [x0, x1] + [v[0] for v in V_in]
         y_candidates = [y0, y1] + [h[1] for h in H_in]
@@ -526,22 +1036,39 @@ class PDFProcessor:
             return [], []
         return col_edges, row_edges
 
-    def _render_grid_cells_with_text(self, bbox, zone_elements, H, V, padding=4):
-        """Rend des wrappers <div> par cellule de la grille existante et y 'snap' le texte."""
-        html = []
+    def _snap_zone_to_grid(self, bbox, zone_elements, geometry):
+        """
+        Calcule la grille existante de la zone et y 'snap' le texte.
+        Retourne ({'cols', 'rows', 'cells': [[r, c, spans], ...]} ou None, ids consommés).
+        """
         consumed_ids = set()
 
-        col_edges, row_edges = self._compute_grid_from_lines(bbox, H, V)
+        col_edges, row_edges = self._compute_grid_from_lines(bbox, geometry)
         if not col_edges or not row_edges:
-            return "", consumed_ids
+            return None, consumed_ids
 
         spans = [{
             "id": e["id"], "x0": e["x0"], "y0": e["y0"], "x1": e["x1"], "y1": e["y1"],
-            "text": e["text"], "font": e["font"], "size": e["size"], "flags": e["flags"]
+            "text": e["text"], "font": e["font"], "size": e["size"], "flags": e["flags"],
+            "color": e.get("color", 0)
         } for e in zone_elements]
 
-        def center(e):
-            return ((e["x0"] + e["x1"]) / 2.0, (e["y0"] + e["y1"]) / 2.0)
+        # chaque span (par son centre) va dans la première cellule qui le contient
+        cells = assign_to_cells(spans, col_edges, row_edges)
+        for cell_spans in cells.values():
+            consumed_ids.update(e["id"] for e in cell_spans)
+
+        return {
+            'cols': col_edges,
+            'rows': row_edges,
+            'cells': [[r, c, cell_spans] for (r, c), cell_spans in sorted(cells.items())],
+        }, consumed_ids
+
+    def _render_grid_cells(self, grid, padding=4):
+        """Rend des wrappers <div> par cellule de la grille existante avec leur texte."""
+        html = []
+        col_edges, row_edges = grid['cols'], grid['rows']
+        cells = {(r, c): cell_spans for r, c, cell_spans in grid['cells']}
 
         for r in range(len(row_edges) - 1):
             cy0, cy1 = row_edges[r], row_edges[r + 1]
@@ -552,19 +1079,9 @@ class PDFProcessor:
                 cell_w = max(1, cx1 - cx0)
                 cell_h = max(1, cy1 - cy0)
 
-                cell_spans = []
-                for e in spans:
-                    if e["id"] in consumed_ids:
-                        continue
-                    cx, cy = center(e)
-                    if (cx >= cx0 and cx <= cx1 and cy >= cy0 and cy <= cy1):
-                        cell_spans.append(e)
-                        consumed_ids.add(e["id"])
-
-                html.append(
-                    f'<div class="pdf-cell" style="position:absolute;left:{cell_x}px;top:{cell_y}px;'
-                    f'width:{cell_w}px;height:{cell_h}px;z-index:1;">'
-                )
+                cell_spans = cells.get((r, c), [])
+
+                html.append(self.html.open_tag('div', 'pdf-cell', self.html.box(cell_x, cell_y, cell_w, cell_h)))
 
                 for e in sorted(cell_spans, key=lambda s: (s["y0"], s["x0"])):  # ordre visuel
                     rel_left = max(padding, e["x0"] - cell_x)
@@ -574,28 +1091,23 @@ class PDFProcessor:
                     is_bold = bool(e["flags"] & 16)
                     fw = "bold" if is_bold else "normal"
 
-                    safe_text = self._escape_html(self._normalize_math_symbols(e["text"]))
-
-                    html.append(
-                        f'<div style="position:absolute;left:{rel_left}px;top:{rel_top}px;'
-                        f'width:{rel_w}px;height:{rel_h}px;white-space:pre;line-height:1.1;'
-                        f'font-family:\'{self._normalize_font(e["font"])}\', Times, serif;'
-                        f'font-size:{e["size"]}px;font-weight:{fw};'
-                        f'user-select:text;z-index:2;">{safe_text}</div>'
+                    safe_text = self._escape_html(e["text"])
+                    style_class = self.styles.class_for(
+                        self._normalize_font(e["font"]), e["size"], fw, self._span_color(e.get("color", 0))
                     )
 
-                html.append('</div>')
+                    html.append(self.html.element(
+                        'div', safe_text, f'pdf-cell-text {style_class}',
+                        self.html.box(rel_left, rel_top, rel_w, rel_h)
+                    ))
 
-        return "".join(html), consumed_ids
+                html.append(self.html.close_tag('div'))
 
-    def _rect_inside_any(self, rect, bboxes, margin=0.8):
-        """True si 'rect' est entièrement contenu dans au moins une bbox (avec marge)."""
-        rx0, ry0, rx1, ry1 = rect
-        for bx0, by0, bx1, by1 in bboxes:
-            if (rx0 >= bx0 - margin and ry0 >= by0 - margin and
-                    rx1 <= bx1 + margin and ry1 <= by1 + margin):
-                return True
-        return False
+        return "".join(html)
+
+    def _rect_inside_any(self, rect, bbox_index, margin=0.8):
+        """True si 'rect' est entièrement contenu dans au moins une bbox de l'index (avec marge)."""
+        return bbox_index.any_containing(rect, margin)
 
     def _extract_all_positioned_elements(self, text_dict):
         """Extrait tous les éléments avec leurs positions exactes"""
@@ -620,7 +1132,6 @@ class PDFProcessor:
                     elements.append({
                         'id': element_id,
                         'text': text,
-                        'bbox': bbox,
                         'x0': bbox[0], 'y0': bbox[1], 'x1': bbox[2], 'y1': bbox[3],
                         'font': span.get("font", "Arial"),
                         'size': span.get("size", 12),
@@ -661,7 +1172,6 @@ class PDFProcessor:
                         e = dict(e)  # copie
                         e['text'] = sym
                         e['x1'] = max(e['x1'], n['x1'])
-                        e['bbox'] = (e['x0'], e['y0'], e['x1'], e['y1'])
                         keep.append(e)
                         i += 2
                         continue
@@ -669,32 +1179,91 @@ class PDFProcessor:
             i += 1
         return keep
 
-    def _detect_smart_table_zones(self, elements):
+    def _same_baseline(self, a, b):
+        """Même ligne de base : fort recouvrement vertical et bas de boîte aligné."""
+        h_min = max(1e-3, min(a['y1'] - a['y0'], b['y1'] - b['y0']))
+        h_max = max(h_min, a['y1'] - a['y0'], b['y1'] - b['y0'])
+        overlap = min(a['y1'], b['y1']) - max(a['y0'], b['y0'])
+        return overlap >= 0.6 * h_min and abs(a['y1'] - b['y1']) <= 0.35 * h_max
+
+    def _merge_line_spans(self, elements, max_gap_factor=0.5, match_size=True):
+        """
+        Fusionne les spans consécutifs d'une même ligne de base en un seul élément
+        lorsque police, taille, flags et couleur concordent et que l'écart est faible.
+        Les positions d'origine sont conservées dans 'parts' (x0, y0, x1, y1, texte).
+        Pour l'OCR (match_size=False), la taille estimée des mots est ignorée.
+        """
+        if not elements:
+            return elements
+
+        # Regroupement vertical grossier par centre, puis tri gauche -> droite
+        elems = sorted(elements, key=lambda e: ((e['y0'] + e['y1']) / 2.0, e['x0']))
+        rows, current, ref_center, ref_h = [], [], 0.0, 0.0
+        for e in elems:
+            center = (e['y0'] + e['y1']) / 2.0
+            if current and abs(center - ref_center) <= 0.5 * ref_h:
+                current.append(e)
+                continue
+            if current:
+                rows.append(current)
+            current, ref_center, ref_h = [e], center, max(1.0, e['y1'] - e['y0'])
+        if current:
+            rows.append(current)
+
+        def style_key(e):
+            key = (e.get('font'), e.get('flags', 0), e.get('color', 0))
+            return key + (round(e.get('size', 0), 1),) if match_size else key
+
+        merged = []
+
+        def flush(line, owned):
+            # le texte assemblé peut former de nouvelles paires ('x' + '<=' …) : normalisé une fois
+            if owned:
+                line['text'] = self._normalize_math_symbols(line['text'])
+            merged.append(line)
+
+        for row in rows:
+            row.sort(key=lambda e: e['x0'])
+            line, owned = None, False
+            for e in row:
+                if line is not None:
+                    size = max(1.0, line['size'])
+                    gap = e['x0'] - line['x1']
+                    if (style_key(e) == style_key(line) and self._same_baseline(line, e)
+                            and -0.2 * size <= gap <= max_gap_factor * size):
+                        if not owned:
+                            line = dict(line)
+                            line['parts'] = list(line.get('parts') or
+                                                 [(line['x0'], line['y0'], line['x1'], line['y1'], line['text'])])
+                            owned = True
+                        line['parts'].extend(e.get('parts') or [(e['x0'], e['y0'], e['x1'], e['y1'], e['text'])])
+                        sep = ' ' if gap > 0.15 * size else ''
+                        line['text'] = line['text'] + sep + e['text']
+                        line['x1'] = max(line['x1'], e['x1'])
+                        line['y0'] = min(line['y0'], e['y0'])
+                        line['y1'] = max(line['y1'], e['y1'])
+                        line['size'] = max(line['size'], e['size'])
+                        continue
+                    flush(line, owned)
+                line, owned = e, False
+            if line is not None:
+                flush(line, owned)
+
+        return merged
+
+    def _detect_smart_table_zones(self, elements, store=None):
         """Détecte les zones qui contiennent des tableaux (seuils plus stricts)."""
         if not elements:
             return []
+        if store is None:
+            store = ElementStore.from_dicts(elements)
 
-        # Tri visuel : haut -> bas
-        sorted_elements = sorted(elements, key=lambda e: e['y0'])
-
-        # Grouper en lignes approx.
-        lines, current_line = [], []
+        # Tri visuel haut -> bas, puis lignes approx. (chaque ligne triée gauche -> droite)
         tolerance_y = 8
-
-        for element in sorted_elements:
-            if not current_line:
-                current_line = [element]
-            else:
-                avg_y = sum(e['y0'] for e in current_line) / len(current_line)
-                if abs(element['y0'] - avg_y) <= tolerance_y:
-                    current_line.append(element)
-                else:
-                    current_line.sort(key=lambda e: e['x0'])
-                    lines.append(current_line)
-                    current_line = [element]
-        if current_line:
-            current_line.sort(key=lambda e: e['x0'])
-            lines.append(current_line)
+        lines = [
+            [elements[i] for i in store.order('x0', indices=line)]
+            for line in store.cluster_lines(store.order('y0'), tolerance_y)
+        ]
 
         # Séquences de lignes "table"
         table_zones, potential = [], []
@@ -817,7 +1386,7 @@ class PDFProcessor:
                     else:
                         cell_style += " text-align: left;"
 
-                clean_text = self._normalize_math_symbols(cell_text).strip()
+                clean_text = cell_text.strip()
                 table_html += f'<{tag} style="{cell_style}">{self._escape_html(clean_text)}</{tag}>'
 
             table_html += '</tr>'
@@ -829,82 +1398,28 @@ class PDFProcessor:
 
     def _organize_elements_into_smart_rows(self, table_zone):
         """Organise intelligemment les éléments en lignes"""
-        if not table_zone:
-            return []
-
         # Trier par Y croissant (haut -> bas), puis X croissant
-        sorted_elements = sorted(table_zone, key=lambda e: (e['y0'], e['x0']))
-
-        rows = []
-        current_row = []
         tolerance_y = 6  # Tolérance réduite pour plus de précision
-
-        for element in sorted_elements:
-            if not current_row:
-                current_row = [element]
-            else:
-                avg_y = sum(e['y0'] for e in current_row) / len(current_row)
-
-                if abs(element['y0'] - avg_y) <= tolerance_y:
-                    current_row.append(element)
-                else:
-                    current_row.sort(key=lambda e: e['x0'])
-                    rows.append(current_row)
-                    current_row = [element]
-
-        if current_row:
-            current_row.sort(key=lambda e: e['x0'])
-            rows.append(current_row)
-
-        return rows
+        return cluster_rows(table_zone, tolerance_y)
 
     def _analyze_table_columns(self, rows):
         """Analyse la structure des colonnes du tableau"""
-        all_x_positions = []
-
-        for row in rows:
-            for elem in row:
-                all_x_positions.append(elem['x0'])
-
-        unique_positions = sorted(set(all_x_positions))
-        column_thresholds = []
         tolerance = 12
-
-        for pos in unique_positions:
-            found = False
-            for i, threshold in enumerate(column_thresholds):
-                if abs(pos - threshold) < tolerance:
-                    column_thresholds[i] = (column_thresholds[i] + pos) / 2
-                    found = True
-                    break
-
-            if not found:
-                column_thresholds.append(pos)
-
-        column_thresholds.sort()
+        thresholds = column_thresholds((elem['x0'] for row in rows for elem in row), tolerance)
 
         return {
-            'thresholds': column_thresholds,
-            'count': len(column_thresholds),
+            'thresholds': thresholds,
+            'count': len(thresholds),
             'tolerance': tolerance
         }
 
     def _extract_smart_row_cells(self, row, column_info):
         """Extrait intelligemment les cellules d'une ligne"""
         thresholds = column_info['thresholds']
-        tolerance = column_info['tolerance']
         cells = [''] * len(thresholds)
 
         for elem in row:
-            elem_x = elem['x0']
-            best_col = 0
-            min_distance = abs(elem_x - thresholds[0])
-
-            for j, threshold in enumerate(thresholds):
-                distance = abs(elem_x - threshold)
-                if distance < min_distance:
-                    min_distance = distance
-                    best_col = j
+            best_col = nearest_column(thresholds, elem['x0'])
 
             if cells[best_col]:
                 cells[best_col] += " " + elem['text']
@@ -936,6 +1451,14 @@ class PDFProcessor:
         css_width = max(1, element['x1'] - element['x0'])
         css_height = max(1, element['y1'] - element['y0'])
 
+        if element.get('font') == OCR_REGION_FONT:
+            # Texte lu dans une image affichée : calque transparent, sélectionnable et indexable
+            style_class = self.styles.class_for('Arial', element['size'], 'normal', None)
+            return self.html.element(
+                'div', self._escape_html(element.get('text', '')), f'pdf-ocr-layer {style_class}',
+                self.html.box(css_left, css_top, css_width, css_height)
+            )
+
         font_size = element['size']
         is_bold = bool(element['flags'] & 16)
         font_weight = 'bold' if is_bold else 'normal'
@@ -947,122 +1470,230 @@ class PDFProcessor:
             'Ingredients of dry premix' in str(element.get('text', ''))
         )
 
-        safe_text = self._escape_html(self._normalize_math_symbols(element.get('text','')))
+        safe_text = self._render_parts(element)
+        font_family = self._normalize_font(element.get('font', 'Times New Roman'))
 
         if is_footnote:
             font_size = max(7, font_size)  # Police minimale pour lisibilité
-            return f'''
-            <div class="pdf-footnote" style="
-                position: absolute;
-                left: {css_left}px;
-                top: {css_top}px;
-                width: {css_width}px;
-                min-height: {css_height}px;
-                font-family: '{self._normalize_font(element.get('font','Times New Roman'))}', Times, serif;
-                font-size: {font_size}px;
-                font-weight: {font_weight};
-                line-height: 1.1;
-                color: #666;
-                white-space: pre;
-                word-wrap: break-word;
-                z-index: 2;
-                user-select: text;
-            ">{safe_text}</div>
-            '''
+            style_class = self.styles.class_for(font_family, font_size, font_weight, '#666')
+            return self.html.element(
+                'div', safe_text, f'pdf-footnote {style_class}',
+                self.html.box(css_left, css_top, css_width, css_height, height_prop='min-height')
+            )
 
         if font_size > 12:
             font_weight = 'bold'
         css_height = max(css_height, font_size * 1.2)
 
-        return f'''
-        <div class="pdf-text-element" style="
-            position: absolute;
-            left: {css_left}px;
-            top: {css_top}px;
-            width: {css_width}px;
-            height: {css_height}px;
-            font-family: '{self._normalize_font(element.get('font','Times New Roman'))}', Times, serif;
-            font-size: {font_size}px;
-            font-weight: {font_weight};
-            line-height: 1.1;
-            white-space: pre;
-            overflow: visible;
-            z-index: 2;
-            user-select: text;
-        ">{safe_text}</div>
-        '''
+        style_class = self.styles.class_for(
+            font_family, font_size, font_weight, self._span_color(element.get('color', 0))
+        )
+        return self.html.element(
+            'div', safe_text, f'pdf-text-element {style_class}',
+            self.html.box(css_left, css_top, css_width, css_height)
+        )
+
+    def _render_parts(self, element):
+        """
+        Contenu d'un élément : pour une ligne fusionnée, chaque span d'origine est
+        replacé à son décalage (les écarts ne s'écrasent pas dans white-space: pre) ;
+        les espaces entre spans restent dans le flux pour la sélection et la copie.
+        """
+        parts = element.get('parts')
+        if not parts or len(parts) < 2:
+            return self._escape_html(element.get('text', ''))
+
+        # spans accolés ou séparés d'une espace ordinaire regroupés :
+        # seuls les écarts plus larges qu'une espace sont repositionnés
+        size = max(1.0, element.get('size') or 1.0)
+        runs = []
+        for x0, y0, x1, y1, text in parts:
+            gap = x0 - runs[-1][2] if runs else None
+            if gap is not None and gap <= 0.35 * size:
+                runs[-1][2] = x1
+                runs[-1][3] += (' ' if gap > 0.15 * size else '') + text
+            else:
+                runs.append([x0, y0, x1, text])
+        if len(runs) < 2:
+            return self._escape_html(element.get('text', ''))
+
+        return ' '.join(
+            self.html.element(
+                'span', self._escape_html(text), 'pdf-part',
+                self.html.box(x0 - element['x0'], y0 - element['y0'])
+            ).rstrip('\n')
+            for x0, y0, _, text in runs
+        )
 
-    def _render_svg_overlay(self, page):
+    def _page_svg(self, page):
         """
-        Overlay SVG sans texte : text_as_path=False permet de séparer
-        le texte (balises <text>) des vrais tracés vectoriels (paths, lignes, formes).
-        On extrait d'abord les symboles mathématiques du SVG, puis on supprime le texte.
+        SVG de la page : text_as_path=False permet de séparer le texte
+        (balises <text>) des vrais tracés vectoriels (paths, lignes, formes).
         """
         try:
-            # text_as_path=False : le texte est en balises <text>, les dessins en <path>
-            svg = page.get_svg_image(matrix=fitz.Matrix(1, 1), text_as_path=False)
-
-            # Extraire les symboles mathématiques du SVG avant de supprimer le texte
-            math_symbols_html = self._extract_math_symbols_from_svg(svg, page)
-
-            # Supprimer uniquement les balises <text> (texte déjà affiché en HTML)
-            svg = re.sub(r'<text[\s\S]*?</text>', '', svg, flags=re.IGNORECASE)
-
-            return f'''
-            {math_symbols_html}
-            <div class="pdf-svg-overlay" style="
-                position:absolute;left:0;top:0;width:{page.rect.width}px;height:{page.rect.height}px;
-                z-index:0;pointer-events:none;overflow:visible;
-            ">{svg}</div>
-            '''
+            return page.get_svg_image(matrix=fitz.Matrix(1, 1), text_as_path=False)
         except Exception as e:
-            print(f"    SVG overlay failed: {e}")
+            print(f"    SVG page failed: {e}")
             return ""
 
-    def _extract_math_symbols_from_svg(self, svg, page):
+    def _strip_svg(self, svg, keep_images=False):
+        """Supprime le texte (déjà affiché en HTML) et, sauf demande, les images (rendues en <img>)."""
+        svg = SVG_TEXT_RE.sub('', svg)
+        if not keep_images:
+            svg = SVG_IMAGE_RE.sub('', svg)
+        return svg
+
+    def _render_svg_overlay(self, page_width, page_height, svg):
+        """Overlay SVG sans texte"""
+        return self.html.element(
+            'div', svg, 'pdf-svg-overlay',
+            self.html.style(('width', self.html.px(page_width)), ('height', self.html.px(page_height)))
+        )
+
+    def _rasterize_vector_layer(self, svg):
+        """Rasterise la couche vectorielle (SVG sans texte) en PNG de fond pour les pages pathologiques."""
+        try:
+            scale = getattr(settings, 'PDF_VECTOR_RASTER_SCALE', 1.5)
+            svg_doc = fitz.open(stream=svg.encode('utf-8'), filetype="svg")
+            try:
+                pix = svg_doc[0].get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=True)
+                return pix.tobytes("png")
+            finally:
+                svg_doc.close()
+        except Exception as e:
+            print(f"    Rasterisation vectorielle échouée: {e}")
+            return None
+
+    def _render_vector_raster(self, page_width, page_height, png_bytes):
+        if not png_bytes:
+            return ""
+        return self.html.void(
+            'img', 'pdf-vector-raster',
+            self.html.style(('width', self.html.px(page_width)), ('height', self.html.px(page_height))),
+            {'src': f"data:image/png;base64,{base64.b64encode(png_bytes).decode()}", 'alt': ''}
+        )
+
+    def _choose_vector_strategy(self, svg_bytes, grid_bytes, primitive_count, other_items, budget,
+                                grid_lossless=True):
+        """
+        Choisit UNE stratégie de rendu vectoriel pour la page :
+        - 'none'  : rien à dessiner
+        - 'grid'  : uniquement des filets/rectangles alignés -> divs simples
+        - 'svg'   : tracés quelconques tenant dans le budget d'octets
+        - 'raster': page pathologique -> image de fond
+        grid_bytes vaut None si la page n'est pas représentable en filets.
+        Des filets avec perte (grid_lossless=False : pointillés, traits colorés…)
+        ne sont préférés qu'au raster, quand le SVG dépasse le budget.
+        """
+        if not primitive_count and not other_items and not svg_bytes:
+            return 'none'
+        if grid_bytes is not None and grid_bytes <= budget:
+            if svg_bytes > budget or (grid_lossless and grid_bytes <= svg_bytes):
+                return 'grid'
+        if svg_bytes <= budget:
+            return 'svg'
+        return 'raster'
+
+    def _analyze_vector_layer(self, page, geometry, grid_bboxes, keep_svg_images=False, force_raster=False,
+                              can_render=True):
+        """
+        Choix de la stratégie de la couche vectorielle (budget PDF_VECTOR_BYTE_BUDGET)
+        et données nécessaires à son rendu : filets, SVG sans texte ou PNG.
+        Des filets sans perte (traits alignés au style rendu) l'emportent d'office :
+        le SVG de la page n'est alors pas demandé à MuPDF. Sinon, filets avec perte
+        et SVG sont comparés par _choose_vector_strategy.
+        'force_raster' (page hors budget) : PNG directement, sans filets à construire.
+        Sans 'can_render' (images hors budget de pixels), pas de SVG : MuPDF y
+        décoderait les images ; seuls des filets, même avec perte, sont possibles.
+        Hors limite de temps de l'étape, la couche garde ce qui est déjà construit :
+        les filets sans demander le SVG, puis le SVG sans le rasteriser.
+        """
+        budget = getattr(settings, 'PDF_VECTOR_BYTE_BUDGET', 200_000)
+        primitive_count = geometry.primitive_count
+
+        if not can_render:
+            if geometry.other_items or not primitive_count:
+                print("    Couche vectorielle: none (images hors budget de pixels)")
+                return {'strategy': 'none'}
+            print("    Couche vectorielle: grid (images hors budget de pixels)")
+            return self._collect_drawings(geometry, grid_bboxes)
+
+        grid_bytes = None
+        grid_layer = None
+        if not geometry.other_items and primitive_count and not keep_svg_images and not force_raster:
+            grid_layer = self._collect_drawings(geometry, grid_bboxes)
+            grid_bytes = len(self._render_drawings(grid_layer))
+            if geometry.lossless_grid and grid_bytes <= budget:
+                print(f"    Couche vectorielle: grid (filets {grid_bytes} o)")
+                return grid_layer
+
+        if geometry.is_empty() and not keep_svg_images:
+            return {'strategy': 'none'}
+        if self.page_budget is not None and self.page_budget.check_stage('vectors'):
+            return grid_layer or {'strategy': 'none'}
+
+        svg = self._page_svg(page)
+        stripped = self._strip_svg(svg, keep_images=keep_svg_images) if svg else ""
+        has_svg_images = keep_svg_images and bool(SVG_IMAGE_RE.search(stripped))
+        # Le poids des images embarquées n'entre pas dans le budget vectoriel
+        svg_only_items = geometry.other_items + geometry.styled_items
+        svg_bytes = len(SVG_IMAGE_DATA_RE.sub('', stripped)) if (primitive_count or svg_only_items or has_svg_images) else 0
+
+        if force_raster and svg_bytes:
+            strategy = 'raster'
+        else:
+            strategy = self._choose_vector_strategy(
+                svg_bytes, grid_bytes, primitive_count, svg_only_items + (1 if has_svg_images else 0), budget,
+                grid_lossless=geometry.lossless_grid
+            )
+        if strategy == 'raster' and self.page_budget is not None and self.page_budget.check_stage('vectors'):
+            strategy = 'svg'
+        print(f"    Couche vectorielle: {strategy} (svg {svg_bytes} o, filets {grid_bytes} o)")
+
+        if strategy == 'grid':
+            return grid_layer
+        if strategy == 'svg':
+            return {'strategy': 'svg', 'svg': stripped}
+        if strategy == 'raster':
+            return {'strategy': 'raster', 'png': self._rasterize_vector_layer(stripped)}
+        return {'strategy': strategy}
+
+    def _render_vector_layer(self, vector, page_width, page_height):
+        """Rendu HTML de la couche vectorielle décrite dans le layout."""
+        strategy = vector['strategy']
+        if strategy == 'grid':
+            return self._render_drawings(vector)
+        if strategy == 'svg':
+            return self._render_svg_overlay(page_width, page_height, vector['svg'])
+        if strategy == 'raster':
+            return self._render_vector_raster(page_width, page_height, vector['png'])
+        return ""
+
+    def _extract_math_symbols(self, geometry, page, budget=None):
         """
         Détecte les petits dessins vectoriels (paths) qui peuvent être des symboles mathématiques
-        et utilise OCR pour les reconnaître.
+        et utilise OCR pour les reconnaître. Retourne [(x0, y0, symbole), ...].
+        Hors budget de temps ('budget'), la recherche s'arrête avec les symboles déjà trouvés.
         """
-        math_symbols_html = ""
+        math_symbols = []
 
         if not OCR_AVAILABLE:
-            return math_symbols_html
+            return math_symbols
 
         try:
-            # 1) Extraire tous les paths du SVG avec leur bounding box approximative
-            path_pattern = r'<path[^>]*\s+d="([^"]+)"[^>]*/>'
-            small_paths = []
-
-            for match in re.finditer(path_pattern, svg, re.IGNORECASE):
-                path_data = match.group(1)
-                # Extraire les coordonnées du path pour estimer sa bbox
-                coords = re.findall(r'[-+]?\d*\.?\d+', path_data)
-                if len(coords) >= 4:
-                    try:
-                        nums = [float(c) for c in coords]
-                        x_coords = [nums[i] for i in range(0, len(nums), 2)]
-                        y_coords = [nums[i] for i in range(1, len(nums), 2)]
-
-                        x0, x1 = min(x_coords), max(x_coords)
-                        y0, y1 = min(y_coords), max(y_coords)
-                        width = x1 - x0
-                        height = y1 - y0
-
-                        # Détecter les petits paths (probablement des symboles)
-                        # Typiquement un symbole <= fait 10-20px de large
-                        if 5 < width < 40 and 5 < height < 30:
-                            small_paths.append({
-                                'bbox': (x0, y0, x1, y1),
-                                'width': width,
-                                'height': height
-                            })
-                    except:
-                        continue
+            # 1) Petits tracés (bbox issues de la géométrie de page, sans repasser par le SVG)
+            # Typiquement un symbole <= fait 10-20px de large
+            small_paths = geometry.symbol_candidates()
 
             # 2) Pour chaque petit path, extraire une image et utiliser OCR
-            for path_info in small_paths:
-                x0, y0, x1, y1 = path_info['bbox']
+            if budget is not None:
+                budget.start_stage('symbol_ocr')
+            for x0, y0, x1, y1 in small_paths:
+                if budget is not None and budget.check_stage('symbol_ocr'):
+                    break
+                if budget is not None and budget.over_time():
+                    budget.degrade(NO_SYMBOL_OCR, f"{len(small_paths)} petits tracés à reconnaître")
+                    break
 
                 # Ajouter un peu de marge
                 margin = 3
@@ -1073,9 +1704,8 @@ class PDFProcessor:
                     continue
 
                 try:
-                    # Extraire l'image de cette petite zone
-                    pix = page.get_pixmap(clip=rect, matrix=fitz.Matrix(3, 3))  # 3x zoom pour meilleure qualité
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                    # Rendu en niveaux de gris de cette petite zone, zoom 3x (216 dpi), sans copie des pixels
+                    img = self._render_for_ocr(page, 216, clip=rect)
 
                     # OCR spécialisé pour symboles mathématiques
                     custom_config = (
@@ -1095,33 +1725,40 @@ class PDFProcessor:
                             text = '≠'
 
                         if text in ['≤', '≥', '≠', '±', '×', '÷']:
-                            math_symbols_html += f'''
-                            <div class="math-symbol-ocr" style="
-                                position:absolute;
-                                left:{x0}px;
-                                top:{y0}px;
-                                font-size:12px;
-                                white-space:nowrap;
-                                pointer-events:auto;
-                                z-index:3;
-                            ">{text}</div>
-                            '''
+                            math_symbols.append((x0, y0, text))
                 except Exception as e:
                     continue
 
         except Exception as e:
             print(f"    Extraction symboles math du SVG échouée: {e}")
 
-        return math_symbols_html
+        return math_symbols
 
-    def _extract_images_with_positions(self, page, page_num, page_height):
-        """Extraction des images avec positions exactes"""
+    def _extract_images_with_positions(self, page, page_num, page_height, max_pixels=None):
+        """
+        Extraction des images avec positions exactes. Avec 'max_pixels', les images
+        qui feraient dépasser ce total de pixels décodés ne sont pas extraites.
+        """
         images = []
+        pixels = 0
         try:
             image_list = page.get_images()
             for img_index, img in enumerate(image_list):
+                if self.page_budget is not None:
+                    self.page_budget.check_deadline("l'extraction des images")
+                image_pixels = int(img[2] or 0) * int(img[3] or 0)
+                if max_pixels is not None and pixels + image_pixels > max_pixels:
+                    print(f"      Image {img_index} ignorée : budget de {max_pixels} pixels dépassé")
+                    continue
+                pixels += image_pixels
                 try:
                     image_rects = page.get_image_rects(img[0])
+                    if not image_rects:
+                        continue
+                    # Une seule extraction par image, à la taille de son plus grand affichage sur la page
+                    display_size = (max(r.x1 - r.x0 for r in image_rects), max(r.y1 - r.y0 for r in image_rects))
+                    image_data = self._extract_image_data(page, img, page_num, img_index, display_size)
+
                     for rect in image_rects:
                         img_x0, img_y0, img_x1, img_y1 = rect.x0, rect.y0, rect.x1, rect.y1
                         css_left = img_x0
@@ -1133,7 +1770,6 @@ class PDFProcessor:
                         page_h = page.rect.height
                         coverage = (css_width * css_height) / float(max(1.0, page_w * page_h))
 
-                        image_data = self._extract_image_data(page, img, page_num, img_index)
                         if image_data:
                             images.append({
                                 **image_data,
@@ -1146,118 +1782,58 @@ class PDFProcessor:
                 except Exception as e:
                     print(f"      Erreur image {img_index}: {e}")
                     continue
+        except PageBudgetExceeded:
+            raise
         except Exception as e:
             print(f"    Erreur extraction images: {e}")
 
         return images
 
-    def _render_drawings(self, page, grid_bboxes=None):
+    def _collect_drawings(self, geometry, grid_bboxes=None):
         """
-        Rend lignes/rectangles vectoriels simples en HTML (overlay léger).
-        L'overlay SVG couvre déjà l'essentiel.
+        Filets de la page (couche 'grid') : segments H/V et rectangles,
+        hors cadres déjà matérialisés par les cellules d'une grille (les fonds restent).
+        Un rectangle stylé porte ses fond, couleur et épaisseur de trait :
+        (x0, y0, x1, y1, fond, trait, épaisseur).
         """
-        if grid_bboxes is None:
-            grid_bboxes = []
+        grid_index = SpatialIndex(grid_bboxes or [])
+        rects = []
+        for rect, style in zip(geometry.RECTS, geometry.rect_styles):
+            if style is None:
+                if not self._rect_inside_any(rect, grid_index):
+                    rects.append(rect)
+            elif style[0] is not None or not self._rect_inside_any(rect, grid_index):
+                rects.append(rect + tuple(style))
+        return {
+            'strategy': 'grid',
+            'H': geometry.H,
+            'V': geometry.V,
+            'RECTS': rects,
+        }
 
+    def _render_drawings(self, drawings):
+        """Rend lignes/rectangles vectoriels simples en HTML (filets div)."""
         html = []
-        try:
-            drawings = page.get_drawings()
-        except Exception as e:
-            print(f"    Erreur get_drawings(): {e}")
-            return ""
-
-        for d in drawings:
-            items = d.get("items", [])
-            for it in items:
-                try:
-                    if not it:
-                        continue
-                    cmd = it[0]
-
-                    if cmd == "l":
-                        if len(it) >= 3 and isinstance(it[1], (tuple, list)):
-                            p1, p2 = it[1], it[2]
-                            x0, y0 = float(p1[0]), float(p1[1])
-                            x1, y1 = float(p2[0]), float(p2[1])
-                        elif len(it) >= 5:
-                            _, x0, y0, x1, y1 = it[:5]
-                            x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)
-                        else:
-                            continue
-
-                        left = min(x0, x1)
-                        top = min(y0, y1)
-                        width = abs(x1 - x0)
-                        height = abs(y1 - y0)
-
-                        if height < 0.5:  # horizontale
-                            html.append(
-                                f'<div style="position:absolute;left:{left}px;top:{y0}px;'
-                                f'width:{width}px;border-top:1px solid #333;z-index:0;pointer-events:none;"></div>'
-                            )
-                        elif width < 0.5:  # verticale
-                            html.append(
-                                f'<div style="position:absolute;left:{x0}px;top:{top}px;'
-                                f'height:{height}px;border-left:1px solid #333;z-index:0;pointer-events:none;"></div>'
-                            )
-
-                    elif cmd == "re":
-                        if len(it) >= 2 and hasattr(it[1], "x0"):
-                            r = it[1]
-                            x0, y0, x1, y1 = float(r.x0), float(r.y0), float(r.x1), float(r.y1)
-                        elif len(it) >= 5:
-                            _, x0, y0, x1, y1 = it[:5]
-                            x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)
-                        else:
-                            continue
-
-                        rect = (x0, y0, x1, y1)
-                        if self._rect_inside_any(rect, grid_bboxes):
-                            continue
-
-                        html.append(
-                            f'<div style="position:absolute;left:{x0}px;top:{y0}px;'
-                            f'width:{x1 - x0}px;height:{y1 - y0}px;border:1px solid #333;'
-                            f'z-index:0;pointer-events:none;"></div>'
-                        )
-                except Exception as e_item:
-                    print(f"      Skip drawing item {it[:2]}… cause: {e_item}")
-                    continue
+        for x0, y, x1, _ in drawings['H']:
+            html.append(self.html.element('div', '', 'pdf-rule-h', self.html.box(x0, y, x1 - x0)))
+        for x, y0, _, y1 in drawings['V']:
+            html.append(self.html.element('div', '', 'pdf-rule-v', self.html.box(x, y0, None, y1 - y0)))
+        for x0, y0, x1, y1, *style in drawings['RECTS']:
+            if not style:
+                html.append(self.html.element('div', '', 'pdf-rule-rect', self.html.box(x0, y0, x1 - x0, y1 - y0)))
+                continue
+            # trait centré sur le bord du rectangle, comme dans le PDF
+            fill, stroke, width = style
+            half = width / 2.0 if stroke else 0.0
+            html.append(self.html.element('div', '', 'pdf-rule-rect', self.html.box(
+                x0 - half, y0 - half, max(0.0, x1 - x0 - 2 * half), max(0.0, y1 - y0 - 2 * half),
+                extra=(('background', fill),
+                       ('border', f"{self.html.px(width)} solid {stroke}" if stroke else 'none'))
+            )))
 
         return "".join(html)
 
-    def _collect_vector_primitives(self, page):
-        """Retourne listes de segments horizontaux/verticaux et rectangles (bbox)."""
-        H, V, RECTS = [], [], []
-        try:
-            for d in page.get_drawings():
-                for it in d.get("items", []):
-                    cmd = it[0] if it else None
-                    if cmd == "l":
-                        if len(it) >= 3 and isinstance(it[1], (tuple, list)):
-                            x0, y0 = float(it[1][0]), float(it[1][1])
-                            x1, y1 = float(it[2][0]), float(it[2][1])
-                        elif len(it) >= 5:
-                            _, x0, y0, x1, y1 = it[:5]
-                            x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)
-                        else:
-                            continue
-                        if abs(y1 - y0) < 0.5:
-                            H.append((min(x0, x1), y0, max(x0, x1), y0))
-                        elif abs(x1 - x0) < 0.5:
-                            V.append((x0, min(y0, y1), x0, max(y0, y1)))
-                    elif cmd == "re":
-                        if len(it) >= 2 and hasattr(it[1], "x0"):
-                            r = it[1]
-                            RECTS.append((float(r.x0), float(r.y0), float(r.x1), float(r.y1)))
-                        elif len(it) >= 5:
-                            _, x0, y0, x1, y1 = it[:5]
-                            RECTS.append((float(x0), float(y0), float(x1), float(y1)))
-        except Exception as e:
-            print(f"    _collect_vector_primitives error: {e}")
-        return H, V, RECTS
-
-    def _zone_has_vector_grid(self, bbox, H, V, RECTS):
+    def _zone_has_vector_grid(self, bbox, geometry):
         """
         True si la zone bbox contient une grille déjà tracée dans le PDF :
         - au moins 3 horizontales + 3 verticales qui tombent dans la zone, ou
@@ -1277,47 +1853,140 @@ class PDFProcessor:
             h_cov = max(0, min(ry1, y1) - max(ry0, y0)) / max(1, (y1 - y0))
             return w_cov > 0.6 and h_cov > 0.4
 
-        h_in = [h for h in H if inside_line_h(h)]
-        v_in = [v for v in V if inside_line_v(v)]
-        if any(inside_rect(r) for r in RECTS):
+        h_in = [h for h in geometry.h_index.query((x0, y0 - 1, x1, y1 + 1)) if inside_line_h(h)]
+        v_in = [v for v in geometry.v_index.query((x0 - 1, y0, x1 + 1, y1)) if inside_line_v(v)]
+        if any(inside_rect(r) for r in geometry.rect_index.query(bbox)):
             return True
         return (len(h_in) >= 3 and len(v_in) >= 3)
 
-    def _fallback_simple_extraction(self, page, page_num):
-        """Extraction simple en cas d'échec"""
-        content = self._normalize_math_symbols(page.get_text() or "")
-        page_html = f'''
-        <div class="pdf-page-simple" style="
-            width: 595px; height: 842px; margin: 20px auto;
-            background: white; border: 1px solid #ddd; padding: 20px;
-            font-family: 'Times New Roman', Times, serif; line-height: 1.4;
-        ">
-            <pre style="white-space: pre-wrap; font-family: inherit;">{self._escape_html(content)}</pre>
-        </div>
-        '''
-        return content, page_html, [], set()
+    def _save_failed_page(self, checkpoint, page, page_num, base_css):
+        """
+        Enregistre le layout minimal d'une page dont le traitement a échoué ('page'
+        vaut None si elle n'a pas pu être chargée). Si même cet enregistrement
+        échoue, le curseur du point de reprise s'arrête avant la page.
+        """
+        try:
+            if page is not None:
+                layout = self._fallback_layout(page, page_num)
+            else:
+                layout = {'page': page_num, 'width': 595, 'height': 842, 'fallback': ''}
+            content, page_html, _ = self._render_page_layout(layout)
+            checkpoint.save_page(
+                page_num, layout['width'], layout['height'], layout, page_html, content, [],
+                css=base_css + self.styles.to_css(), styles=self.styles.keys()
+            )
+        except Exception as e:
+            print(f"Erreur enregistrement page {page_num + 1} (texte brut): {str(e)}")
 
-    def _extract_image_data(self, page, img, page_num, img_index):
-        """Extrait les données d'une image"""
+    def _fallback_layout(self, page, page_num):
+        """Layout minimal (texte brut de la page, à ses dimensions) en cas d'échec de l'analyse"""
+        try:
+            text = page.get_text() or ""
+        except Exception as e:
+            print(f"    Extraction texte simple échouée: {e}")
+            text = ""
+        return {
+            'page': page_num,
+            'width': page.rect.width,
+            'height': page.rect.height,
+            'fallback': self._normalize_math_symbols(text),
+        }
+
+    def _render_fallback_layout(self, layout):
+        """
+        Rendu texte brut d'une page, dans le même conteneur que les pages analysées
+        (dimensions de la page, data-page pour la navigation par vignettes).
+        """
+        content = layout['fallback']
+        # layouts enregistrés sans dimensions : format A4
+        page_width, page_height = layout.get('width', 595), layout.get('height', 842)
+        page_html = self.html.open_tag(
+            'div', 'pdf-page-exact pdf-page-simple',
+            self.html.style(('width', self.html.px(page_width)), ('height', self.html.px(page_height))),
+            {'data-page': layout['page'] + 1}
+        )
+        page_html += self.html.element('pre', self._escape_html(content), 'pdf-page-text')
+        page_html += self.html.close_tag('div')
+        return content, page_html, set()
+
+    def _extract_image_data(self, page, img, page_num, img_index, display_size=None):
+        """
+        Extrait les données d'une image. Avec 'display_size' (taille d'affichage en pt),
+        une image nettement plus grande que nécessaire est réduite (voir
+        _display_sized_image), sauf si PDF_KEEP_ORIGINAL_IMAGES demande l'original.
+        """
         try:
             xref = img[0]
             base_image = page.parent.extract_image(xref)
 
             image_bytes = base_image["image"]
             image_ext = base_image["ext"]
+            display_sized = False
+            if display_size and not getattr(settings, 'PDF_KEEP_ORIGINAL_IMAGES', False):
+                reduced = self._display_sized_image(page, xref, base_image, *display_size)
+                if reduced:
+                    image_bytes, image_ext = reduced
+                    display_sized = True
             image_base64 = base64.b64encode(image_bytes).decode()
 
             return {
                 'data': image_bytes,
                 'base64': image_base64,
                 'format': image_ext,
-                'name': f'page_{page_num + 1}_img_{img_index + 1}.{image_ext}'
+                'name': f'page_{page_num + 1}_img_{img_index + 1}.{image_ext}',
+                'display_sized': display_sized
             }
 
         except Exception as e:
             print(f"        Erreur extraction données image: {e}")
             return None
 
+    def _display_sized_image(self, page, xref, base_image, display_width, display_height):
+        """
+        Image réduite à PDF_IMAGE_DISPLAY_SCALE fois sa taille d'affichage (1 pt = 1 px CSS),
+        ou None si l'original n'est pas nettement plus grand. Le décodage passe par MuPDF
+        (JPX, JBIG2, CMYK, masque alpha compris), avec réduction entière (shrink) avant le
+        rééchantillonnage final. Retourne (octets, extension) : PNG si transparence ou
+        original PNG (dessins), sinon JPEG (PDF_IMAGE_JPEG_QUALITY).
+        """
+        scale = getattr(settings, 'PDF_IMAGE_DISPLAY_SCALE', 2.0)
+        target = (max(1, int(display_width * scale)), max(1, int(display_height * scale)))
+        width, height = base_image.get("width") or 0, base_image.get("height") or 0
+        if width * height <= IMAGE_DOWNSAMPLE_MIN_RATIO * target[0] * target[1]:
+            return None
+
+        try:
+            doc = page.parent
+            pix = fitz.Pixmap(doc, xref)
+            if pix.colorspace is None:
+                return None
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            if pix.colorspace.n not in (1, 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            if base_image.get("smask"):
+                pix = fitz.Pixmap(pix, fitz.Pixmap(doc, base_image["smask"]))
+
+            # Réduction par puissances de 2 sans descendre sous la taille cible
+            shrink = int(math.log2(max(1.0, min(pix.width / target[0], pix.height / target[1]))))
+            if shrink:
+                pix.shrink(shrink)
+
+            img = self.image_processor.pixmap_to_image(pix)
+            img_format = 'PNG' if pix.alpha or base_image.get("ext") == 'png' else 'JPEG'
+            data = self.image_processor.create_thumbnail(
+                img, target, img_format=img_format, quality=getattr(settings, 'PDF_IMAGE_JPEG_QUALITY', 85)
+            )
+        except Exception as e:
+            print(f"        Réduction de l'image {xref} impossible ({e}) : original conservé")
+            return None
+
+        if not data or len(data) >= len(base_image["image"]):
+            return None
+        print(f"        Image {xref}: {width}x{height} px pour {display_width:.0f}x{display_height:.0f} pt "
+              f"({width * 72.0 / max(display_width, 1.0):.0f} dpi) -> {len(base_image['image'])} o -> {len(data)} o")
+        return data, ('png' if img_format == 'PNG' else 'jpeg')
+
     def _generate_improved_css(self):
         """CSS avec styles pour notes de bas de page & overlay SVG"""
         css_base = """
@@ -1332,8 +2001,24 @@ class PDFProcessor:
             transform: none !important; font-family: 'Times New Roman', Times, serif !important; z-index: 2 !important; user-select: text !important; }
         .pdf-footnote { position: absolute !important; margin: 0 !important; padding: 2px !important; border: none !important; background: transparent !important;
             font-family: 'Times New Roman', Times, serif !important; font-size: 7px !important; color: #666 !important; line-height: 1.2 !important; max-width: 400px; z-index: 2 !important; user-select: text !important; }
+        .pdf-text-element { line-height: 1.1; white-space: pre; overflow: visible; }
+        .pdf-footnote { white-space: pre; word-wrap: break-word; }
+        .pdf-part { position: absolute; white-space: pre; }
+        .pdf-cell-text { position: absolute; white-space: pre; line-height: 1.1; user-select: text; z-index: 2; }
         .pdf-image-exact { position: absolute !important; margin: 0 !important; padding: 0 !important; border: none !important; transform: none !important; z-index: 0 !important; pointer-events: none !important; }
+        .pdf-svg-overlay { position: absolute; left: 0; top: 0; z-index: 0; pointer-events: none; overflow: visible; }
         .pdf-svg-overlay svg { width: 100% !important; height: 100% !important; display: block !important; }
+        .pdf-vector-raster { position: absolute; left: 0; top: 0; z-index: 0; pointer-events: none; }
+        .pdf-cell { position: absolute; z-index: 1; }
+        .math-symbol-ocr { position: absolute; font-size: 12px; white-space: nowrap; pointer-events: auto; z-index: 3; }
+        .pdf-ocr-layer { position: absolute; margin: 0; padding: 0; color: transparent !important; white-space: pre;
+            line-height: 1.1; overflow: hidden; z-index: 2; user-select: text; }
+        .pdf-rule-h, .pdf-rule-v, .pdf-rule-rect { position: absolute; z-index: 0; pointer-events: none; }
+        .pdf-rule-h { border-top: 1px solid #333; }
+        .pdf-rule-v { border-left: 1px solid #333; }
+        .pdf-rule-rect { border: 1px solid #333; }
+        .pdf-page-text { position: absolute; left: 0; top: 0; right: 0; bottom: 0; margin: 0; padding: 20px; overflow: auto;
+            white-space: pre-wrap; font-family: 'Times New Roman', Times, serif; font-size: 11px; line-height: 1.4; }
         """
         return css_base
 
@@ -1354,6 +2039,12 @@ class PDFProcessor:
             return f"#{r:02x}{g:02x}{b:02x}"
         return "#000000"
 
+    def _span_color(self, color_value):
+        """Couleur d'un span PyMuPDF (entier sRGB 0xRRGGBB) en CSS"""
+        if isinstance(color_value, int):
+            return f"#{color_value & 0xFFFFFF:06x}"
+        return self._convert_color(color_value)
+
     def _normalize_font(self, font_name):
         """Normalise les noms de police PDF vers des polices web"""
         font_map = {
@@ -1391,36 +2082,9 @@ class PDFProcessor:
         - >= -> ≥
         - != -> ≠
         + normalise quelques tirets, puis remap PUA -> Unicode standard.
+        À n'appeler qu'une fois par texte, à l'extraction (voir text_normalization).
         """
-        if not text:
-            return text
-
-        def repl_cmp(m):
-            s = m.group(0)
-            return {"<=": "≤", ">=": "≥", "!=": "≠"}.get(s, s)
-
-        # 1) ASCII pairs -> vrais symboles
-        text = re.sub(r'<=|>=|!=', repl_cmp, text)
-
-        # 2) Tirets
-        text = re.sub(r'(?<!\d)--(?!\d)', '—', text)
-
-        # 3) PUA -> Unicode
-        text = self._normalize_pua_symbols(text)
-
-        # 4) (Optionnel) Espaces lisibles autour des opérateurs
-        text = re.sub(r'\s*(≤|≥|≠|=|<|>)\s*', r' \1 ', text)
-        text = re.sub(r'\s{2,}', ' ', text).strip()
-
-        return text
-
-        def repl_cmp(m):
-            s = m.group(0)
-            return {"<=": "≤", ">=": "≥", "!=": "≠"}.get(s, s)
-
-        text = re.sub(r'<=|>=|!=', repl_cmp, text)
-        text = re.sub(r'(?<!\d)--(?!\d)', '—', text)
-        return text
+        return normalize_math_symbols(text)
 
     def _detect_tables_in_content(self, content):
         """Détection simple de tableaux dans le contenu"""
@@ -1455,20 +2119,20 @@ class PDFProcessor:
         try:
             content = ""
             formatted_content = ""
+            page_width, page_height = 595, 842
 
             with pdfplumber.open(file_path) as pdf:
                 for page_num, page in enumerate(pdf.pages):
                     page_text = page.extract_text() or ""
                     page_text = self._normalize_math_symbols(page_text)
                     content += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
+                    if page_num == 0:
+                        page_width, page_height = float(page.width), float(page.height)
 
-                    page_html = f'''
-                    <div class="pdf-page-simple" style="
-                        width: 800px; height: 1000px; position: relative; margin: 20px auto;
-                        background: white; border: 1px solid #ddd; padding: 20px;">
-                        <pre style="font-family: inherit; font-size: 12px; white-space: pre-wrap;">{self._escape_html(page_text)}</pre>
-                    </div>
-                    '''
+                    _, page_html, _ = self._render_fallback_layout({
+                        'page': page_num, 'width': float(page.width), 'height': float(page.height),
+                        'fallback': page_text,
+                    })
                     formatted_content += page_html
 
             return {
@@ -1479,8 +2143,8 @@ class PDFProcessor:
                 'modification_date': None,
                 'images': [],
                 'format_info': {
-                    'page_width': 800,
-                    'page_height': 1000,
+                    'page_width': page_width,
+                    'page_height': page_height,
                     'fonts_used': [],
                     'has_images': False,
                     'has_tables': self._detect_tables_in_content(content),
@@ -0,0 +1,141 @@
+import io
+import re
+import zipfile
+
+from django.conf import settings
+
+from . import pdf_classifier
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    from docx import Document as DocxDocument
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+APP_PAGES_RE = re.compile(r'<Pages>(\d+)</Pages>')
+
+# Pages échantillonnées pour décider si le PDF est un scan (l'aperçu doit rester rapide)
+SCAN_SAMPLE_PAGES = 3
+
+
+def build_preview(file_path, file_type):
+    """
+    Aperçu rapide d'un fichier, avant le traitement complet : vignette de la
+    première page, texte brut, nombre et dimensions des pages, détection des
+    scans et coût estimé du traitement (secondes).
+    Retourne un dict (clés absentes si non déterminées) ou None si le type
+    n'est pas pris en charge.
+    """
+    if file_type == 'pdf' and PYMUPDF_AVAILABLE:
+        preview = _preview_pdf(file_path)
+    elif file_type == 'docx' and DOCX_AVAILABLE:
+        preview = _preview_docx(file_path)
+    else:
+        return None
+
+    preview['estimated_cost'] = estimate_cost(preview.get('page_count') or 1, preview.get('is_scanned', False))
+    return preview
+
+
+def estimate_cost(page_count, is_scanned):
+    """Durée de traitement estimée (s) : coût par page natif ou OCR."""
+    per_page = getattr(settings, 'PROCESSING_COST_PER_PAGE', {'native': 0.5, 'scanned': 6.0})
+    return round(page_count * per_page['scanned' if is_scanned else 'native'], 1)
+
+
+def _preview_pdf(file_path):
+    doc = fitz.open(file_path)
+    try:
+        page_count = len(doc)
+        if page_count == 0:
+            return {'page_count': 0}
+
+        first_page = doc[0]
+        width = getattr(settings, 'PREVIEW_THUMBNAIL_WIDTH', 200)
+        scale = width / max(first_page.rect.width, 1)
+        pix = first_page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+
+        text = first_page.get_text("text") or ''
+        return {
+            'page_count': page_count,
+            'page_width': first_page.rect.width,
+            'page_height': first_page.rect.height,
+            'is_scanned': _looks_scanned(doc),
+            'text': text.strip()[:getattr(settings, 'PREVIEW_TEXT_LENGTH', 1000)],
+            'thumbnail': pix.tobytes("jpeg", jpg_quality=getattr(settings, 'PREVIEW_THUMBNAIL_QUALITY', 70)),
+            'thumbnail_ext': 'jpg',
+        }
+    finally:
+        doc.close()
+
+
+def _looks_scanned(doc):
+    """Scan : les pages échantillonnées n'ont pas de couche texte (voir pdf_classifier)."""
+    return pdf_classifier.classify_document(doc, sample=SCAN_SAMPLE_PAGES) == pdf_classifier.OCR
+
+
+def _preview_docx(file_path):
+    """Texte de la première section (pas de rendu graphique pour Word) et nombre de pages déclaré."""
+    limit = getattr(settings, 'PREVIEW_TEXT_LENGTH', 1000)
+    docx = DocxDocument(file_path)
+    parts, length = [], 0
+    for paragraph in docx.paragraphs:
+        if paragraph.text:
+            parts.append(paragraph.text)
+            length += len(paragraph.text) + 1
+        # Un sectPr dans les propriétés du paragraphe termine la section
+        ppr = paragraph._p.pPr
+        if length >= limit or (ppr is not None and ppr.sectPr is not None):
+            break
+
+    preview = {'text': '\n'.join(parts)[:limit], 'is_scanned': False}
+    page_count = _docx_declared_pages(file_path)
+    if page_count:
+        preview['page_count'] = page_count
+    return preview
+
+
+def _docx_declared_pages(file_path):
+    # Nombre de pages enregistré par Word dans docProps/app.xml (absent selon l'éditeur)
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            app = archive.read('docProps/app.xml').decode('utf-8', 'ignore')
+    except (KeyError, zipfile.BadZipFile, OSError):
+        return None
+    match = APP_PAGES_RE.search(app)
+    return int(match.group(1)) if match else None
+
+
+def apply_preview(document):
+    """Calcule l'aperçu d'un document uploadé et l'enregistre ; un échec n'empêche pas le traitement."""
+    from django.core.files.base import ContentFile
+
+    try:
+        preview = build_preview(document.original_file.path, document.file_type)
+    except Exception as e:
+        print(f"Erreur aperçu du document {document.pk}: {e}")
+        return None
+    if not preview:
+        return None
+
+    document.page_count = preview.get('page_count') or document.page_count
+    document.page_width = preview.get('page_width')
+    document.page_height = preview.get('page_height')
+    document.is_scanned = preview.get('is_scanned', False)
+    document.preview_text = preview.get('text', '')
+    document.estimated_cost = preview.get('estimated_cost')
+    if preview.get('thumbnail'):
+        document.preview_thumbnail.save(
+            f"preview_{document.pk}.{preview['thumbnail_ext']}",
+            ContentFile(preview['thumbnail']),
+            save=False,
+        )
+    document.save()
+    print(f"Aperçu: {document.page_count} page(s), scan={document.is_scanned}, coût estimé {document.estimated_cost}s")
+    return preview
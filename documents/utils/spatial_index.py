@@ -0,0 +1,114 @@
+import math
+
+# Au-delà de ce nombre de cases, une bbox n'est pas répartie dans la grille
+# (liste 'large' parcourue à chaque requête) et une requête parcourt tout l'index
+MAX_CELLS = 256
+
+
+class SpatialIndex:
+    """
+    Index spatial par grille uniforme pour les bbox d'une page (x0, y0, x1, y1).
+    Chaque bbox est rangée dans toutes les cases qu'elle touche ; une requête ne
+    teste que les bbox des cases couvertes au lieu de parcourir toute la liste.
+    Les segments H/V (bbox dégénérées) sont acceptés ; les bbox aux coordonnées
+    non finies (inf, NaN) sont ignorées.
+    """
+
+    def __init__(self, bboxes=(), items=None, cell=64.0):
+        self.cell = float(cell)
+        self._cells = {}
+        self._large = []
+        self._bboxes = []
+        self._items = []
+        items = list(items) if items is not None else None
+        for i, bbox in enumerate(bboxes):
+            self.insert(bbox, items[i] if items is not None else bbox)
+
+    def __len__(self):
+        return len(self._bboxes)
+
+    def _span(self, lo, hi):
+        return range(math.floor(lo / self.cell), math.floor(hi / self.cell) + 1)
+
+    def _cell_spans(self, x0, y0, x1, y1):
+        """Cases couvertes (en x, en y), ou None si elles dépassent MAX_CELLS."""
+        if (x1 - x0) / self.cell + 1 > MAX_CELLS or (y1 - y0) / self.cell + 1 > MAX_CELLS:
+            return None
+        xs, ys = self._span(x0, x1), self._span(y0, y1)
+        if len(xs) * len(ys) > MAX_CELLS:
+            return None
+        return xs, ys
+
+    def insert(self, bbox, item=None):
+        x0, y0, x1, y1 = (float(v) for v in bbox)
+        if not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+            return
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        idx = len(self._bboxes)
+        self._bboxes.append((x0, y0, x1, y1))
+        self._items.append(bbox if item is None else item)
+        spans = self._cell_spans(x0, y0, x1, y1)
+        if spans is None:
+            self._large.append(idx)
+            return
+        for cx in spans[0]:
+            for cy in spans[1]:
+                self._cells.setdefault((cx, cy), []).append(idx)
+
+    def _candidates(self, bbox, margin=0.0):
+        x0, y0, x1, y1 = (float(v) for v in bbox)
+        x0, y0, x1, y1 = x0 - margin, y0 - margin, x1 + margin, y1 + margin
+        if any(math.isnan(v) for v in (x0, y0, x1, y1)):
+            return
+        spans = None
+        if all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+            spans = self._cell_spans(x0, y0, x1, y1)
+        if spans is None:
+            # requête trop étendue : parcours direct de toutes les bbox
+            indices = range(len(self._bboxes))
+        else:
+            indices = self._cell_candidates(*spans)
+        for idx in indices:
+            bx0, by0, bx1, by1 = self._bboxes[idx]
+            if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0:
+                yield idx
+
+    def _cell_candidates(self, xs, ys):
+        seen = set(self._large)
+        yield from self._large
+        for cx in xs:
+            for cy in ys:
+                for idx in self._cells.get((cx, cy), ()):
+                    if idx not in seen:
+                        seen.add(idx)
+                        yield idx
+
+    def query(self, bbox, margin=0.0):
+        """Éléments dont la bbox touche 'bbox' agrandie de 'margin' (ordre d'insertion)."""
+        return [self._items[i] for i in sorted(self._candidates(bbox, margin))]
+
+    def overlapping(self, bbox, min_ratio=0.0):
+        """Éléments recouvrant plus de 'min_ratio' de la surface de 'bbox'."""
+        x0, y0, x1, y1 = bbox
+        area = max((x1 - x0) * (y1 - y0), 1e-6)
+        found = []
+        for i in sorted(self._candidates(bbox)):
+            bx0, by0, bx1, by1 = self._bboxes[i]
+            ix0, iy0 = max(x0, bx0), max(y0, by0)
+            ix1, iy1 = min(x1, bx1), min(y1, by1)
+            if ix1 <= ix0 or iy1 <= iy0:
+                continue
+            if (ix1 - ix0) * (iy1 - iy0) / area > min_ratio:
+                found.append(self._items[i])
+        return found
+
+    def any_containing(self, bbox, margin=0.0):
+        """True si une bbox indexée (agrandie de 'margin') contient entièrement 'bbox'."""
+        x0, y0, x1, y1 = bbox
+        for i in self._candidates(bbox, margin):
+            bx0, by0, bx1, by1 = self._bboxes[i]
+            if (x0 >= bx0 - margin and y0 >= by0 - margin and
+                    x1 <= bx1 + margin and y1 <= by1 + margin):
+                return True
+        return False
@@ -0,0 +1,48 @@
+class StyleRegistry:
+    """
+    Interne les combinaisons de style texte (police, taille, graisse, couleur)
+    d'un document : chaque combinaison distincte devient une classe CSS émise
+    une seule fois dans generated_css, seules les coordonnées restent inline.
+    """
+
+    def __init__(self, prefix='s'):
+        self.prefix = prefix
+        self._classes = {}
+
+    def __len__(self):
+        return len(self._classes)
+
+    def class_for(self, font_family, font_size, font_weight='normal', color=None):
+        """Retourne le nom de classe associé à la combinaison (créé au besoin)."""
+        key = (font_family, round(float(font_size), 2), font_weight, color)
+        name = self._classes.get(key)
+        if name is None:
+            name = f"{self.prefix}{len(self._classes)}"
+            self._classes[key] = name
+        return name
+
+    def keys(self):
+        """Combinaisons internées, dans l'ordre de leurs classes (persistées pour une reprise)."""
+        return [list(key) for key in self._classes]
+
+    @classmethod
+    def from_keys(cls, keys, prefix='s'):
+        """Registre rétabli à partir de keys() : mêmes combinaisons, mêmes noms de classe."""
+        registry = cls(prefix)
+        for key in keys:
+            registry.class_for(*key)
+        return registry
+
+    def to_css(self):
+        """Règles CSS des classes internées, une par ligne."""
+        rules = []
+        for (font_family, font_size, font_weight, color), name in self._classes.items():
+            declarations = [
+                f"font-family: '{font_family}', Times, serif",
+                f"font-size: {font_size:g}px",
+                f"font-weight: {font_weight}",
+            ]
+            if color:
+                declarations.append(f"color: {color}")
+            rules.append(f".{name} {{ {'; '.join(declarations)}; }}")
+        return "\n".join(rules)
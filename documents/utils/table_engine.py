@@ -0,0 +1,71 @@
+from bisect import bisect_left
+
+from .element_store import ElementStore
+
+
+def cluster_rows(elements, tolerance, store=None):
+    """
+    Regroupe les éléments en lignes : tri (y0, x0) puis moyenne glissante de y0
+    (somme incrémentale). Chaque ligne est retournée triée gauche -> droite.
+    """
+    if not elements:
+        return []
+    if store is None:
+        store = ElementStore.from_dicts(elements)
+    return [
+        [elements[i] for i in store.order('x0', indices=line)]
+        for line in store.cluster_lines(store.order('y0', 'x0'), tolerance)
+    ]
+
+
+def column_thresholds(positions, tolerance):
+    """
+    Seuils de colonnes à partir des x0, par balayage des positions triées.
+    Une position ne peut rejoindre que le dernier seuil ouvert : les seuils
+    précédents sont à plus de 'tolerance' de toute position plus grande.
+    Le seuil rejoint devient la moyenne (seuil + position).
+    Les seuils retournés sont strictement croissants.
+    """
+    thresholds = []
+    for pos in sorted(set(positions)):
+        if thresholds and abs(pos - thresholds[-1]) < tolerance:
+            thresholds[-1] = (thresholds[-1] + pos) / 2
+        else:
+            thresholds.append(pos)
+    return thresholds
+
+
+def nearest_column(thresholds, x):
+    """Index du seuil le plus proche de x (égalité -> plus petit index), par bisection."""
+    i = bisect_left(thresholds, x)
+    if i == 0:
+        return 0
+    if i == len(thresholds):
+        return i - 1
+    return i - 1 if abs(x - thresholds[i - 1]) <= abs(x - thresholds[i]) else i
+
+
+def edge_interval(edges, value):
+    """
+    Premier intervalle fermé [edges[k], edges[k+1]] contenant 'value',
+    ou None si 'value' est hors des bords.
+    """
+    if len(edges) < 2 or value < edges[0] or value > edges[-1]:
+        return None
+    return max(0, bisect_left(edges, value) - 1)
+
+
+def assign_to_cells(spans, col_edges, row_edges):
+    """
+    Affecte chaque span (via son centre) à la première cellule, en ordre
+    ligne par ligne, qui le contient. Retourne {(r, c): [spans]} en conservant
+    l'ordre d'origine des spans dans chaque cellule.
+    """
+    cells = {}
+    for e in spans:
+        r = edge_interval(row_edges, (e["y0"] + e["y1"]) / 2.0)
+        c = edge_interval(col_edges, (e["x0"] + e["x1"]) / 2.0)
+        if r is None or c is None:
+            continue
+        cells.setdefault((r, c), []).append(e)
+    return cells
@@ -0,0 +1,64 @@
+import re
+from functools import lru_cache
+
+# Glyphes Private Use Area (PUA) fréquemment vus en PDF (Symbol/Wingdings/Dingbats)
+PUA_MAP = {
+    # opérateurs
+    '\uf0a3': '≤',  # 
+    '\uf0b3': '≥',  # 
+    '\uf0bd': '≠',  # 
+    '\uf0b1': '±',  # 
+    # micro/signes divers rencontrés
+    '\uf06f': 'µ',  #  (souvent map micro/mu selon la fonte)
+    # puces (bullets)
+    '\uf0b7': '•',  #  / bullet Wingdings
+    '\uf0a7': '▪',  #  / small square bullet
+    '\uf0d8': '•',  #  / black circle bullet (selon police)
+    '\uf0fc': '•',  #  variants parfois mappés comme bullets
+    '\uf0e7': '•',  #  (selon fichiers, mieux vaut tomber sur • que laisser PUA)
+}
+PUA_TABLE = str.maketrans(PUA_MAP)
+
+CMP_PAIRS = {"<=": "≤", ">=": "≥", "!=": "≠"}
+CMP_RE = re.compile(r'<=|>=|!=')
+DASH_RE = re.compile(r'(?<!\d)--(?!\d)')
+OPERATOR_SPACING_RE = re.compile(r'\s*(≤|≥|≠|=|<|>)\s*')
+MULTI_SPACE_RE = re.compile(r'\s{2,}')
+
+# Les spans courts (mots, nombres, symboles) se répètent beaucoup : on les mémorise
+CACHE_MAX_LENGTH = 64
+
+
+def normalize_pua_symbols(text):
+    """Remap des glyphes PUA vers l'Unicode standard (table str.translate)."""
+    if not text:
+        return text
+    return text.translate(PUA_TABLE)
+
+
+def _normalize(text):
+    # 1) ASCII pairs -> vrais symboles
+    text = CMP_RE.sub(lambda m: CMP_PAIRS[m.group(0)], text)
+    # 2) Tirets
+    text = DASH_RE.sub('—', text)
+    # 3) PUA -> Unicode
+    text = text.translate(PUA_TABLE)
+    # 4) Espaces lisibles autour des opérateurs
+    text = OPERATOR_SPACING_RE.sub(r' \1 ', text)
+    return MULTI_SPACE_RE.sub(' ', text).strip()
+
+
+_normalize_cached = lru_cache(maxsize=4096)(_normalize)
+
+
+def normalize_math_symbols(text):
+    """
+    Convertit proprement certains couples ASCII en symboles mathématiques
+    (<= -> ≤, >= -> ≥, != -> ≠), normalise les tirets, remap PUA -> Unicode
+    et espace les opérateurs. Idempotent : à appliquer une seule fois, à l'extraction.
+    """
+    if not text:
+        return text
+    if len(text) <= CACHE_MAX_LENGTH:
+        return _normalize_cached(text)
+    return _normalize(text)
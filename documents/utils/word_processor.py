@@ -3,16 +3,27 @@ from docx import Document
 from docx.shared import Inches
 import io
 import base64
+import html
 from datetime import datetime
 from django.utils import timezone
 
+from . import processing_profiles
+
 
 class WordProcessor:
     """Processeur pour les fichiers Word (.docx et .doc)"""
 
-    def process(self, file_path, document_instance):
-        """Traite un fichier Word en maintenant le formatage"""
+    def process(self, file_path, document_instance, profile=None):
+        """
+        Traite un fichier Word en maintenant le formatage.
+        Profil sans mise en page ('text-only') : texte brut seul, sans mammoth ni images.
+        """
+        profile = processing_profiles.profile_of(document_instance, profile)
+        stages = processing_profiles.stages(profile)
         try:
+            if not stages['layout']:
+                return self._process_text_only(file_path)
+
             # Utiliser mammoth pour extraire le HTML avec style
             with open(file_path, "rb") as docx_file:
                 result = mammoth.convert_to_html(docx_file)
@@ -28,8 +39,8 @@ class WordProcessor:
             # Extraire les métadonnées
             core_props = doc.core_properties
 
-            # Extraire les images
-            images = self._extract_images(doc)
+            # Extraire les images (mammoth les intègre déjà au HTML)
+            images = self._extract_images(doc) if stages['images'] else []
 
             # Analyser la structure du document
             structure_info = self._analyze_document_structure(doc)
@@ -62,6 +73,31 @@ class WordProcessor:
         except Exception as e:
             raise Exception(f"Erreur lors du traitement du document Word: {str(e)}")
 
+    def _process_text_only(self, file_path):
+        """Texte brut du document (paragraphes et tableaux), sans conversion HTML par mammoth ni images"""
+        doc = Document(file_path)
+        content = self._extract_text_content(doc)
+        core_props = doc.core_properties
+        paragraphs = ''.join(f'<p>{html.escape(line)}</p>' for line in content.split('\n'))
+        return {
+            'content': content,
+            'formatted_content': f'<div class="word-document">{paragraphs}</div>',
+            'author': core_props.author or '',
+            'creation_date': self._convert_datetime(core_props.created),
+            'modification_date': self._convert_datetime(core_props.modified),
+            'images': [],
+            'format_info': {
+                'page_width': None,
+                'page_height': None,
+                'fonts_used': [],
+                'has_images': False,
+                'has_tables': len(doc.tables) > 0,
+                'has_headers': False,
+                'has_footers': False,
+                'generated_css': ''
+            }
+        }
+
     def _extract_text_content(self, doc):
         """Extrait le texte brut du document"""
         text_content = []
@@ -1,4 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse, Http404
@@ -7,12 +8,16 @@ from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils import timezone
+from django.conf import settings
 import threading
 import json
 
-from .models import Document, DocumentImage, DocumentFormat
+from .models import Document, DocumentImage, DocumentFormat, DocumentPage
 from .forms import DocumentUploadForm, DocumentFilterForm
 from .utils.document_processor import DocumentProcessor
+from .utils.file_response import serve_file
+from .utils.preview import apply_preview
+from .utils.processing_profiles import PROFILES
 
 
 def document_list(request):
@@ -94,6 +99,9 @@ def document_upload(request):
         if form.is_valid():
             document = form.save()
 
+            # Aperçu rapide (vignette, nombre de pages, scan, coût estimé) avant le traitement complet
+            apply_preview(document)
+
             # Lancer le traitement en arrière-plan
             thread = threading.Thread(
                 target=process_document_background,
@@ -124,10 +132,17 @@ def document_detail(request, pk):
     if request.user.is_authenticated and document.uploaded_by != request.user:
         raise Http404("Document non trouvé")
 
+    # Pages déjà traitées, affichées avant la fin du traitement
+    pages = [] if document.is_processed() else list(document.pages.only('page_number', 'html'))
+
     context = {
         'document': document,
         'images': document.images.all(),
         'format_info': getattr(document, 'format_info', None),
+        'pages': pages,
+        'last_page': pages[-1].page_number if pages else 0,
+        # Bandeau de vignettes du visualiseur
+        'thumbnails': document.pages.filter(thumbnail__gt='').only('page_number', 'rendered_at', 'thumbnail'),
     }
 
     return render(request, 'documents/document_detail.html', context)
@@ -144,12 +159,54 @@ def document_status(request, pk):
         'error_message': document.error_message,
         'has_content': bool(document.extracted_content),
         'has_formatted_content': bool(document.formatted_content),
-        'progress': get_processing_progress(document.status)
+        'processed_pages': document.processed_pages,
+        'page_count': document.page_count,
+        'processing_profile': document.processing_profile,
+        'progress': get_processing_progress(document.status, document.processed_pages, document.page_count)
     }
 
     return JsonResponse(data)
 
 
+@require_http_methods(["GET"])
+def document_pages(request, pk):
+    """
+    API des pages déjà traitées (disponibles avant la fin du traitement).
+    ?after=N ne retourne que les pages suivant la page N.
+    """
+    document = get_object_or_404(Document, pk=pk)
+
+    # Vérifier les permissions
+    if request.user.is_authenticated and document.uploaded_by != request.user:
+        return JsonResponse({'error': 'Permission refusée'}, status=403)
+
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Paramètre after invalide'}, status=400)
+
+    pages = document.pages.filter(page_number__gt=after).only('page_number', 'width', 'height', 'html',
+                                                               'thumbnail', 'rendered_at')
+    format_info = getattr(document, 'format_info', None)
+
+    return JsonResponse({
+        'status': document.status,
+        'processed_pages': document.processed_pages,
+        'page_count': document.page_count,
+        'generated_css': format_info.generated_css if format_info else '',
+        'pages': [
+            {
+                'number': page.page_number,
+                'width': page.width,
+                'height': page.height,
+                'html': page.html,
+                'thumbnail': _page_thumbnail_url(page) if page.thumbnail else None,
+            }
+            for page in pages
+        ],
+    })
+
+
 @require_http_methods(["POST"])
 def reprocess_document(request, pk):
     """Relance le traitement d'un document"""
@@ -159,14 +216,16 @@ def reprocess_document(request, pk):
     if request.user.is_authenticated and document.uploaded_by != request.user:
         return JsonResponse({'error': 'Permission refusée'}, status=403)
 
-    if document.status == 'processing':
+    if document.is_processing():
         return JsonResponse({'error': 'Le document est déjà en cours de traitement'}, status=400)
 
-    # Réinitialiser le statut
-    document.status = 'pending'
-    document.error_message = None
-    document.processed_at = None
-    document.save()
+    # Profil de traitement optionnel ('profile') : un changement de profil repart de la première page
+    profile = request.POST.get('profile') or None
+    if profile and profile not in PROFILES:
+        return JsonResponse({'error': f'Profil inconnu: {profile}', 'profiles': list(PROFILES)}, status=400)
+
+    # Réinitialiser le statut (reprise à la première page non terminée si le traitement avait échoué)
+    document.reset_processing(processing_profile=profile)
 
     # Lancer le traitement
     thread = threading.Thread(
@@ -197,6 +256,33 @@ def delete_document(request, pk):
     })
 
 
+def _page_thumbnail_url(page):
+    # Versionnée par la date de rendu : le navigateur peut la garder en cache
+    url = reverse('documents:page_thumbnail', args=[page.document_id, page.page_number])
+    return f"{url}?v={int(page.rendered_at.timestamp())}"
+
+
+@require_http_methods(["GET"])
+def page_thumbnail(request, pk, page_number):
+    """Vignette d'une page (cache navigateur longue durée : l'URL est versionnée)"""
+    document = get_object_or_404(Document, pk=pk)
+
+    # Vérifier les permissions
+    if request.user.is_authenticated and document.uploaded_by != request.user:
+        raise Http404("Document non trouvé")
+
+    page = get_object_or_404(DocumentPage, document=document, page_number=page_number)
+    if not page.thumbnail:
+        raise Http404("Vignette non disponible")
+
+    max_age = getattr(settings, 'PAGE_THUMBNAIL_CACHE_SECONDS', 365 * 24 * 3600)
+    try:
+        return serve_file(request, page.thumbnail, as_attachment=False,
+                          cache_control=f'private, max-age={max_age}, immutable')
+    except (FileNotFoundError, ValueError):
+        raise Http404("Fichier non trouvé")
+
+
 @require_http_methods(["GET"])
 def download_original(request, pk):
     """Télécharge le fichier original"""
@@ -207,13 +293,9 @@ def download_original(request, pk):
         raise Http404("Document non trouvé")
 
     try:
-        response = HttpResponse(
-            document.original_file.read(),
-            content_type='application/octet-stream'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{document.original_file.name}"'
-        return response
-    except Exception as e:
+        # Streaming (Range supporté) ou délégation au serveur frontal
+        return serve_file(request, document.original_file)
+    except (FileNotFoundError, ValueError):
         raise Http404("Fichier non trouvé")
 
 
@@ -271,8 +353,10 @@ def process_document_background(document_id):
         print(f"Erreur lors du traitement: {str(e)}")
 
 
-def get_processing_progress(status):
-    """Retourne le pourcentage de progression basé sur le statut"""
+def get_processing_progress(status, processed_pages=0, page_count=0):
+    """Retourne le pourcentage de progression basé sur le statut (et les pages traitées si connues)"""
+    if status in ('processing', 'partial') and page_count:
+        return min(99, int(100 * processed_pages / page_count))
     progress_map = {
         'pending': 0,
         'processing': 50,
@@ -287,7 +371,7 @@ def home(request):
     # Statistiques rapides
     total_docs = Document.objects.count()
     processed_docs = Document.objects.filter(status='completed').count()
-    processing_docs = Document.objects.filter(status='processing').count()
+    processing_docs = Document.objects.filter(status__in=['processing', 'partial']).count()
     error_docs = Document.objects.filter(status='error').count()
 
     # Documents récents